@@ -0,0 +1,264 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""HTTP latency and throughput benchmark for the API, with regression check.
+
+Builds synthetic version databases in a temporary DB_PATH through the real
+`setup_database`/`insert_data` path, starts the server on them and drives
+every `/changes` filter mix, `/upgrade_info` and `/api/apriori` at the given
+concurrency, once per requested content encoding. Latency percentiles,
+throughput and bandwidth are written to a JSON report.
+The response cache is disabled (RESPONSE_CACHE_SIZE=0) so every timed request
+runs its query and serialization; `--cached` also times each scenario with
+the cache on, reported as `<scenario>@cached`.
+With `--baseline`, the run fails (exit code 1) when a scenario's p95 latency
+or throughput is worse than the baseline by more than `--threshold`.
+
+    python benchmarks/api_bench.py --rows 50000 --concurrency 8 --output bench.json
+    python benchmarks/api_bench.py --encodings identity gzip zstd
+    python benchmarks/api_bench.py --baseline benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import http.client
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from common import ROOT, free_port, start_server
+
+CATEGORIES = ("MODEL", "FIELD", "XML_RECORD")
+
+
+def module_names_and_models(modules: int) -> tuple[list, dict]:
+    module_names = [f"module_{i}" for i in range(modules)]
+    return module_names, {m: [f"{m.replace('_', '.')}.model{j}" for j in range(8)] for m in module_names}
+
+
+def synthetic_records(version: str, rows: int, modules: int, rng: random.Random) -> list:
+    """ChangeRecords spread over `modules` modules, with the value mix of real analysis files."""
+    from upgrade_analysis_parser.models import ChangeRecord
+
+    module_names, models = module_names_and_models(modules)
+    records = []
+    for i in range(rows):
+        module = rng.choice(module_names)
+        model = rng.choice(models[module])
+        category = CATEGORIES[i % len(CATEGORIES)]
+        minor = f"{version}.1.{rng.randint(0, 5)}"
+        if category == "MODEL":
+            change_type = rng.choice(("NEW", "OBSOLETE"))
+            raw_line = f"{change_type.lower()} model {model}#{i}"
+            records.append(ChangeRecord(version=minor, module=module, change_category=category,
+                                        change_type=change_type, model_name=model, raw_line=raw_line))
+        elif category == "FIELD":
+            change_type = rng.choice(("NEW", "DEL", "MODIFIED"))
+            field = f"field_{i}"
+            raw_line = f"{module} / {model} / {field} (char) : {change_type}"
+            records.append(ChangeRecord(version=minor, module=module, change_category=category,
+                                        change_type=change_type, model_name=model, field_name=field,
+                                        description=change_type, raw_line=raw_line,
+                                        details_json={"field_type": "char"}))
+        else:
+            change_type = rng.choice(("NEW", "DEL"))
+            raw_line = f"{change_type} ir.ui.view: {module}.view_{i}"
+            records.append(ChangeRecord(version=minor, module=module, change_category=category,
+                                        change_type=change_type, record_model="ir.ui.view",
+                                        xml_id=f"{module}.view_{i}", raw_line=raw_line))
+    return records
+
+
+def generate_databases(db_path: Path, versions, rows: int, modules: int, seed: int) -> dict:
+    """Create synthetic `{version}.db` and `apriori.db` files; return names to query."""
+    os.environ["DB_PATH"] = str(db_path)
+    sys.path.insert(0, str(ROOT))
+    from upgrade_analysis_parser.processing.db import setup_database, insert_data, db_path_for_version, sqlite_db
+    from upgrade_analysis_parser.processing.apriori import make_schema
+
+    rng = random.Random(seed)
+    module_names, models = module_names_and_models(modules)
+
+    for version in versions:
+        path = db_path_for_version(float(version))
+        setup_database(path)
+        insert_data(path, synthetic_records(version, rows, modules, rng))
+
+    with sqlite_db("apriori", clean=True) as cursor:
+        make_schema(cursor)
+        for version in versions:
+            cursor.executemany(
+                "INSERT INTO renamed_modules (version, old_name, new_name) VALUES (?, ?, ?)",
+                [(version, f"old_{m}", m) for m in module_names[: modules // 2]],
+            )
+            cursor.executemany(
+                "INSERT INTO merged_modules (version, from_name, to_name) VALUES (?, ?, ?)",
+                [(version, f"merged_{m}", m) for m in module_names[modules // 2:]],
+            )
+
+    module = module_names[0]
+    return {"module": module, "model": models[module][0], "minor": f"{versions[-1]}.1.1"}
+
+
+def scenarios(version: str, names: dict) -> dict:
+    module, model, minor = names["module"], names["model"], names["minor"]
+    base = f"/{version}/changes"
+    return {
+        "changes_module": f"{base}?module={module}",
+        "changes_model": f"{base}?model={model}",
+        "changes_version": f"{base}?version={minor}",
+        "changes_module_model": f"{base}?module={module}&model={model}",
+        "changes_module_version": f"{base}?module={module}&version={minor}",
+        "changes_model_version": f"{base}?model={model}&version={minor}",
+        "changes_all_filters": f"{base}?module={module}&model={model}&version={minor}",
+        "changes_category_type": f"{base}?change_category=FIELD&change_type=DEL&module={module}",
+        "changes_field_type": f"{base}?field_type=char&module={module}",
+        "upgrade_info": "/upgrade_info",
+        "apriori_version": f"/api/apriori/{version}",
+        "apriori_query": f"/api/apriori?q={module}",
+        "apriori_prefix": "/api/apriori?q=module_1&mode=prefix",
+    }
+
+
+def drive(port: int, url: str, requests: int, concurrency: int, encoding: str = "identity") -> dict:
+    """Send `requests` GETs to `url` from `concurrency` keep-alive clients."""
+    headers = {"Accept-Encoding": encoding}
+    latencies, errors, received = [], [0], [0]
+    lock = threading.Lock()
+    remaining = iter(range(requests))
+
+    def client():
+        conn = http.client.HTTPConnection("127.0.0.1", port)
+        own, own_bytes = [], 0
+        while True:
+            with lock:
+                if next(remaining, None) is None:
+                    break
+            start = time.perf_counter()
+            try:
+                conn.request("GET", url, headers=headers)
+                response = conn.getresponse()
+                own_bytes += len(response.read())
+                ok = response.status == 200
+            except (OSError, http.client.HTTPException):
+                ok = False
+                conn.close()
+                conn = http.client.HTTPConnection("127.0.0.1", port)
+            if ok:
+                own.append(time.perf_counter() - start)
+            else:
+                with lock:
+                    errors[0] += 1
+        with lock:
+            latencies.extend(own)
+            received[0] += own_bytes
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    result = {"url": url, "encoding": encoding, "requests": len(latencies), "errors": errors[0],
+              "throughput_rps": round(len(latencies) / elapsed, 2),
+              "avg_response_bytes": round(received[0] / max(len(latencies), 1)),
+              "bandwidth_bytes_per_s": round(received[0] / elapsed)}
+    if latencies:
+        cuts = statistics.quantiles(latencies, n=100, method="inclusive")
+        result.update(p50_ms=round(cuts[49] * 1000, 3), p95_ms=round(cuts[94] * 1000, 3),
+                      p99_ms=round(cuts[98] * 1000, 3))
+    return result
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Return a description of every scenario that regressed against `baseline`."""
+    regressions = []
+    for name, base in baseline.get("scenarios", {}).items():
+        current = report["scenarios"].get(name)
+        if not current or "p95_ms" not in current or "p95_ms" not in base:
+            continue
+        if current["p95_ms"] > base["p95_ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {current['p95_ms']}ms vs baseline {base['p95_ms']}ms")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold):
+            regressions.append(
+                f"{name}: throughput {current['throughput_rps']} req/s vs baseline {base['throughput_rps']} req/s"
+            )
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--versions", nargs="+", default=["17.0", "18.0"])
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic changes per version.")
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--server", choices=["gunicorn", "flask"], default="gunicorn")
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=500, help="Requests per scenario.")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per scenario.")
+    parser.add_argument("--only", nargs="+", help="Run only these scenarios.")
+    parser.add_argument("--encodings", nargs="+", default=["identity", "gzip"],
+                        help="Accept-Encoding values to run each scenario with (identity, gzip, zstd).")
+    parser.add_argument("--cached", action="store_true",
+                        help="Also time every scenario with the response cache enabled.")
+    parser.add_argument("--output", default="bench_report.json")
+    parser.add_argument("--baseline", help="Report to compare against.")
+    parser.add_argument("--threshold", type=float, default=0.2, help="Allowed relative regression.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="openupgrade-bench-") as tmp:
+        db_path = Path(tmp)
+        print(f"Generating {args.rows} rows x {len(args.versions)} versions in {db_path}...")
+        names = generate_databases(db_path, args.versions, args.rows, args.modules, args.seed)
+
+        report = {
+            "meta": {key: getattr(args, key) for key in
+                     ("versions", "rows", "modules", "server", "workers", "threads", "concurrency", "requests",
+                      "encodings", "cached")},
+            "scenarios": {},
+        }
+        # Uncached runs time the SQL and serialization of every request; warmup would otherwise fill the cache
+        runs = [("", {"RESPONSE_CACHE_SIZE": 0})] + ([("@cached", {})] if args.cached else [])
+        for suffix, cache_env in runs:
+            port = free_port()
+            server = start_server(port, args.server, DB_PATH=db_path, LOG_PATH=db_path / "logs",
+                                  SERVER_WORKERS=args.workers, SERVER_THREADS=args.threads, METRICS_ENABLED=True,
+                                  **cache_env)
+            try:
+                for name, url in scenarios(args.versions[-1], names).items():
+                    if args.only and name not in args.only:
+                        continue
+                    for encoding in args.encodings:
+                        key = (name if encoding == "identity" else f"{name}@{encoding}") + suffix
+                        drive(port, url, args.warmup, 1, encoding)
+                        result = report["scenarios"][key] = drive(port, url, args.requests, args.concurrency, encoding)
+                        print(f"{key:<38} p50 {result.get('p50_ms', '-'):>9} ms  p95 {result.get('p95_ms', '-'):>9} ms"
+                              f"  p99 {result.get('p99_ms', '-'):>9} ms  {result['throughput_rps']:>9} req/s"
+                              f"  {result['avg_response_bytes']:>10} B/resp  errors {result['errors']}")
+            finally:
+                server.terminate()
+                server.wait()
+
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Report written to {args.output}")
+
+    if args.baseline:
+        regressions = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regression beyond {args.threshold:.0%} against {args.baseline}.")
+
+
+if __name__ == "__main__":
+    main()
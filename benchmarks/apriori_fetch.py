@@ -0,0 +1,183 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""Check the conditional download and static parsing behind `manage.py apriori`.
+
+Serves stand-in apriori.py files with an ETag from a local `http.server`,
+then checks that the first fetch downloads and caches the file, that the
+next one revalidates it with `If-None-Match` and reuses the cached body on
+304, that `extract_literals` never runs the file and ignores non-literal
+values, and that `parse_apriori` stores exactly the expected rows.
+Exits with code 1 on failure.
+
+    python benchmarks/apriori_fetch.py
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+from common import ROOT
+
+# Stand-in files; the 18.0 one would create `{marker}` if it were ever executed
+SOURCES = {
+    "17.0": """
+renamed_modules = {{
+    "account_old": "account",
+    "web_old": "web",
+}}
+merged_modules: dict = {{"sale_a": "sale"}}
+""",
+    "18.0": """
+import os
+os.makedirs({marker!r})
+
+renamed_modules = {{"stock_old": "stock"}}
+merged_modules = dict(crm_a="crm")
+""",
+}
+
+EXPECTED_RENAMED = {("17.0", "account_old", "account"), ("17.0", "web_old", "web"), ("18.0", "stock_old", "stock")}
+EXPECTED_MERGED = {("17.0", "sale_a", "sale")}
+
+
+class AprioriHandler(BaseHTTPRequestHandler):
+    """Serve `/<version>/apriori.py` with a strong ETag and answer 304 on a match."""
+
+    sources: dict = {}
+    requests: list = []
+
+    def do_GET(self):
+        version = self.path.split("/")[1]
+        body = self.sources.get(version)
+        if body is None:
+            self.send_error(404)
+            return
+        body = body.encode("utf-8")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        if_none_match = self.headers.get("If-None-Match")
+        status = 304 if if_none_match == etag else 200
+        self.requests.append((version, status, if_none_match))
+        self.send_response(status)
+        self.send_header("ETag", etag)
+        if status == 200:
+            self.send_header("Content-Type", "text/x-python; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if status == 200:
+            self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def check_fetch(apriori, base_url: str, cache_path: Path) -> list:
+    failures = []
+    url = f"{base_url}/17.0/apriori.py"
+    key = hashlib.sha1(url.encode()).hexdigest()
+    body_path, meta_path = cache_path / f"{key}.py", cache_path / f"{key}.json"
+
+    with apriori.make_session() as session:
+        AprioriHandler.requests.clear()
+        first = apriori.fetch_cached(session, url)
+        if AprioriHandler.requests != [("17.0", 200, None)]:
+            failures.append(f"first fetch: expected one unconditional 200, got {AprioriHandler.requests}")
+        if not body_path.exists() or body_path.read_text(encoding="utf-8") != AprioriHandler.sources["17.0"]:
+            failures.append("first fetch: the body was not written to the cache")
+        etag = json.loads(meta_path.read_text()).get("etag") if meta_path.exists() else None
+        if not etag:
+            failures.append("first fetch: the ETag was not stored next to the body")
+
+        AprioriHandler.requests.clear()
+        second = apriori.fetch_cached(session, url)
+        if AprioriHandler.requests != [("17.0", 304, etag)]:
+            failures.append(f"second fetch: expected a 304 to If-None-Match {etag}, got {AprioriHandler.requests}")
+        if second != first:
+            failures.append("second fetch: the cached body was not reused")
+    print("fetch: first 200 and cached, second revalidated with If-None-Match")
+    return failures
+
+
+def check_extract_literals(apriori, tmp: Path) -> list:
+    failures = []
+    values = apriori.extract_literals(AprioriHandler.sources["18.0"], ("renamed_modules", "merged_modules", "missing"))
+    if (tmp / "executed").exists():
+        failures.append("extract_literals executed the source")
+    if values != {"renamed_modules": {"stock_old": "stock"}, "merged_modules": {}, "missing": {}}:
+        failures.append(f"extract_literals: unexpected values {values}")
+    annotated = apriori.extract_literals(AprioriHandler.sources["17.0"], ("merged_modules",))
+    if annotated != {"merged_modules": {"sale_a": "sale"}}:
+        failures.append(f"extract_literals: annotated assignment read as {annotated}")
+    print("extract_literals: literals read, code not run, non-literals ignored")
+    return failures
+
+
+def check_parse(apriori, base_url: str, db_path: Path, tmp: Path) -> list:
+    failures = []
+    # parse_apriori reads the upstream URLs from get_url(); point it at the local server
+    apriori.get_url = lambda version: f"{base_url}/{version}/apriori.py"
+    for run in ("cold", "warm"):
+        AprioriHandler.requests.clear()
+        apriori.parse_apriori()
+        statuses = sorted((version, status) for version, status, _ in AprioriHandler.requests)
+        expected = [("17.0", 304), ("18.0", 304)] if run == "warm" else [("17.0", 304), ("18.0", 200)]
+        if statuses != expected:
+            failures.append(f"parse_apriori ({run}): expected {expected}, got {statuses}")
+
+        with sqlite3.connect(db_path / "apriori.db") as conn:
+            renamed = set(conn.execute("SELECT version, old_name, new_name FROM renamed_modules"))
+            merged = set(conn.execute("SELECT version, from_name, to_name FROM merged_modules"))
+        if renamed != EXPECTED_RENAMED:
+            failures.append(f"parse_apriori ({run}): renamed_modules rows {sorted(renamed)}")
+        if merged != EXPECTED_MERGED:
+            failures.append(f"parse_apriori ({run}): merged_modules rows {sorted(merged)}")
+        print(f"parse_apriori ({run}): {len(renamed)} renamed and {len(merged)} merged rows, requests {statuses}")
+    if (tmp / "executed").exists():
+        failures.append("parse_apriori executed a downloaded file")
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="openupgrade-apriori-") as tmp:
+        tmp = Path(tmp)
+        db_path, cache_path = tmp / "databases", tmp / "cache"
+        db_path.mkdir()
+        # config reads these once, on the first import of the package
+        os.environ.update(
+            DB_PATH=str(db_path), APRIORI_CACHE_PATH=str(cache_path), APRIORI_VERSIONS="17.0,18.0",
+            APRIORI_INTERNAL_DOCUMENT_NAME="", LOG_PATH=str(tmp / "logs"),
+        )
+        sys.path.insert(0, str(ROOT))
+        from upgrade_analysis_parser.processing import apriori
+
+        AprioriHandler.sources = {version: source.format(marker=str(tmp / "executed")) for version, source in SOURCES.items()}
+        server = ThreadingHTTPServer(("127.0.0.1", 0), AprioriHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            failures = check_fetch(apriori, base_url, cache_path)
+            failures += check_extract_literals(apriori, tmp)
+            failures += check_parse(apriori, base_url, db_path, tmp)
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("Apriori files are revalidated, cached and parsed without being executed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""Check that concurrent identical cache misses share a single build.
+
+First drives `PayloadCache` directly from many threads released together,
+then sends bursts of identical `/changes` and `/upgrade_info` requests to
+the threaded `python server.py` on synthetic databases and reads `/metrics`:
+each burst must trigger exactly one build (misses minus coalesced requests)
+and every client must get the same body. Exits with code 1 on failure.
+
+    python benchmarks/coalescing.py --clients 32
+"""
+
+import argparse
+import http.client
+import os
+import re
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from api_bench import generate_databases
+from common import ROOT, free_port, start_server
+
+
+def burst(clients: int, call) -> list:
+    """Run `call()` from `clients` threads released at the same time; return results or exceptions."""
+    barrier = threading.Barrier(clients)
+    results = [None] * clients
+
+    def worker(index):
+        barrier.wait()
+        try:
+            results[index] = call()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def check_payload_cache(clients: int, tmp: Path) -> list:
+    sys.path.insert(0, str(ROOT))
+    from upgrade_analysis_parser.cache import PayloadCache
+
+    failures = []
+    source = tmp / "source.db"
+    source.write_bytes(b"data")
+    cache = PayloadCache("coalescing-check")
+    builds = []
+
+    def slow_build():
+        builds.append(1)
+        time.sleep(0.2)
+        return b"body", "application/json"
+
+    results = burst(clients, lambda: cache.get_or_build("key", source, slow_build))
+    if len(builds) != 1:
+        failures.append(f"PayloadCache: {len(builds)} builds for {clients} concurrent misses")
+    if any(result is not results[0] for result in results):
+        failures.append("PayloadCache: waiters did not all get the leader's payload")
+
+    builds.clear()
+
+    def failing_build():
+        builds.append(1)
+        time.sleep(0.2)
+        raise ValueError("build failed")
+
+    results = burst(clients, lambda: cache.get_or_build("failing", source, failing_build))
+    if len(builds) != 1 or not all(isinstance(result, ValueError) for result in results):
+        failures.append(f"PayloadCache: failing build ran {len(builds)} times or its error was not shared")
+    # A failed build is not cached: the next request tries again
+    attempts = len(builds)
+    burst(1, lambda: cache.get_or_build("failing", source, failing_build))
+    if len(builds) != attempts + 1:
+        failures.append("PayloadCache: a failed build was cached")
+    return failures
+
+
+def cache_counts(port: int) -> dict:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    conn.request("GET", "/metrics")
+    text = conn.getresponse().read().decode()
+    conn.close()
+    counts = {"hit": 0.0, "miss": 0.0, "coalesced": 0.0}
+    for result, value in re.findall(r'openupgrade_cache_requests_total\{cache="responses",result="(\w+)"\} (\S+)', text):
+        counts[result] = float(value)
+    match = re.search(r'openupgrade_coalesced_requests_total\{cache="responses"\} (\S+)', text)
+    if match:
+        counts["coalesced"] = float(match.group(1))
+    return counts
+
+
+def check_server(clients: int, rows: int, db_path: Path) -> list:
+    names = generate_databases(db_path, ["18.0"], rows, 200, seed=42)
+    urls = [f"/18.0/changes?module={names['module']}", "/18.0/changes?version=18.0", "/upgrade_info"]
+
+    failures = []
+    port = free_port()
+    server = start_server(port, "flask", DB_PATH=db_path, LOG_PATH=db_path / "logs", METRICS_ENABLED=True)
+    try:
+        for url in urls:
+            def fetch():
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+                conn.request("GET", url)
+                response = conn.getresponse()
+                body = response.read()
+                conn.close()
+                return response.status, body
+
+            before = cache_counts(port)
+            results = burst(clients, fetch)
+            after = cache_counts(port)
+            delta = {name: after[name] - before[name] for name in after}
+            builds = delta["miss"] - delta["coalesced"]
+            print(f"{url:<40} builds {builds:.0f}  coalesced {delta['coalesced']:.0f}  hits {delta['hit']:.0f}")
+            if builds != 1:
+                failures.append(f"{url}: {builds:.0f} builds for {clients} concurrent requests")
+            if any(isinstance(result, Exception) or result[0] != 200 for result in results):
+                failures.append(f"{url}: not every request succeeded")
+            elif len({body for _, body in results}) != 1:
+                failures.append(f"{url}: clients got different bodies")
+    finally:
+        server.terminate()
+        server.wait()
+    return failures
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent identical requests per burst.")
+    parser.add_argument("--rows", type=int, default=20000, help="Synthetic changes in the test database.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="openupgrade-coalescing-") as tmp:
+        # config reads DB_PATH once, on the first import of the package
+        db_path = Path(tmp) / "databases"
+        db_path.mkdir()
+        os.environ["DB_PATH"] = str(db_path)
+        failures = check_payload_cache(args.clients, Path(tmp))
+        failures += check_server(args.clients, args.rows, db_path)
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("All concurrent misses were coalesced.")
+
+
+if __name__ == "__main__":
+    main()
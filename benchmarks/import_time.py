@@ -0,0 +1,80 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""Check the cold-start import cost of the server and the manage.py commands.
+
+Runs each entry point under `python -X importtime` in a fresh interpreter,
+keeps the best of a few runs, and fails (exit code 1) when one exceeds its
+budget or loads a module it has no use for (e.g. `requests` in the server).
+
+    python benchmarks/import_time.py
+    python benchmarks/import_time.py --scale 2   # slower machine, double every budget
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT
+
+# name: (command after `python -X importtime`, budget in ms, modules that must not be imported)
+TARGETS = {
+    "server": (["-c", "import server"], 800, {"requests", "git", "tqdm"}),
+    "manage --help": (["manage.py", "--help"], 150, {"requests", "git", "tqdm", "flask", "pydantic"}),
+    "manage get": (
+        ["manage.py", "get", "--object-type", "removed", "--object", "models", "--versions", "1.0",
+         "--output-directory", "{tmp}"],
+        400, {"requests", "git", "tqdm", "flask"},
+    ),
+    "manage parse": (["manage.py", "parse", "--versions", "1.0"], 400, {"requests", "git", "tqdm", "flask"}),
+}
+
+
+def measure(args: list[str], tmp: str) -> tuple[float, set[str]]:
+    """Return the total import time (ms) and the set of imported modules of one run."""
+    env = dict(os.environ, DB_PATH=os.path.join(tmp, "databases"),
+               OPENUPGRADE_SCRIPTS_SOURCES_PATH=os.path.join(tmp, "data_sources"), LOG_PATH=tmp)
+    command = [sys.executable, "-X", "importtime"] + [arg.format(tmp=tmp) for arg in args]
+    result = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True)
+    total_us, modules = 0, set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        modules.add(name.strip())
+        # Top-level imports are indented by a single space; nested ones are already in their cumulative time
+        if len(name) - len(name.lstrip()) == 1:
+            total_us += int(cumulative)
+    return total_us / 1000, modules
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--only", nargs="+", choices=list(TARGETS), help="Check only these entry points.")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per entry point; the fastest one counts.")
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiply every budget by this factor.")
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in args.only or TARGETS:
+            command, budget, forbidden = TARGETS[name]
+            runs = [measure(command, tmp) for _ in range(args.repeat)]
+            total, modules = min(runs, key=lambda run: run[0])
+            budget *= args.scale
+            print(f"{name:<15} {total:8.1f} ms  (budget {budget:.0f} ms)")
+            if total > budget:
+                failures.append(f"{name} took {total:.1f} ms, over its {budget:.0f} ms budget")
+            for module in sorted(forbidden & modules):
+                failures.append(f"{name} imports {module}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""Measure API throughput under gunicorn for several worker counts.
+
+Starts `gunicorn -c gunicorn.conf.py` once per worker count against the
+databases in DB_PATH, hammers one URL from several client processes and
+prints the requests per second reached with each setting.
+
+    python benchmarks/load_workers.py --workers 1 2 4 --url "/18.0/changes?module=account"
+"""
+
+import argparse
+import http.client
+import multiprocessing
+import time
+
+from common import free_port, start_server
+
+
+def _client(port: int, url: str, duration: float, results) -> None:
+    conn = http.client.HTTPConnection("127.0.0.1", port)
+    done, errors = 0, 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            conn.request("GET", url)
+            response = conn.getresponse()
+            response.read()
+            done += response.status == 200
+            errors += response.status != 200
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            conn.close()
+            conn = http.client.HTTPConnection("127.0.0.1", port)
+    results.put((done, errors))
+
+
+def run(workers: int, threads: int, url: str, clients: int, duration: float) -> tuple[float, int]:
+    port = free_port()
+    server = start_server(port, SERVER_WORKERS=workers, SERVER_THREADS=threads)
+    try:
+        results = multiprocessing.Queue()
+        procs = [multiprocessing.Process(target=_client, args=(port, url, duration, results)) for _ in range(clients)]
+        for proc in procs:
+            proc.start()
+        totals = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+    finally:
+        server.terminate()
+        server.wait()
+    done = sum(t[0] for t in totals)
+    errors = sum(t[1] for t in totals)
+    return done / duration, errors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", nargs="+", type=int, default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--url", default="/upgrade_info")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent client processes.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per run.")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'req/s':>10} {'errors':>8} {'speedup':>8}")
+    baseline = None
+    for workers in args.workers:
+        rps, errors = run(workers, args.threads, args.url, args.clients, args.duration)
+        baseline = baseline or rps
+        print(f"{workers:>8} {rps:>10.1f} {errors:>8} {rps / baseline:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
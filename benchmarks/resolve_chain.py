@@ -0,0 +1,106 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""Check multi-hop field resolution across model renames.
+
+Builds small 16.0/17.0/18.0 databases where a model is renamed in one
+version and its fields (listed by OpenUpgrade under the new model name) are
+renamed or deleted in a later one, runs `build_resolve_graph`, and checks
+that `resolve_name` follows the whole chain from the old model name.
+Exits with code 1 on failure.
+
+    python benchmarks/resolve_chain.py
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+from pathlib import Path
+
+from common import ROOT
+
+# version: (renamed models, renamed fields as (model, old, new), deleted fields, known fields)
+VERSIONS = {
+    "16.0": ({"b.one": "b.two"}, [], [], ["b.one.w", "c.plain.v"]),
+    "17.0": ({"a.old": "a.new", "b.two": "b.three"}, [], [], []),
+    "18.0": ({}, [("a.new", "x", "y")], ["a.new.z", "b.three.w"], ["a.new.keep"]),
+}
+
+# (name, from, to): (resolved_name, status)
+EXPECTED = {
+    ("a.old.x", 16.0, 18.0): ("a.new.y", "renamed"),
+    ("a.old.z", 16.0, 18.0): (None, "deleted"),
+    ("a.old.keep", 16.0, 18.0): ("a.new.keep", "renamed"),
+    ("a.old.x", 16.0, 17.0): ("a.new.x", "renamed"),
+    ("a.new.x", 17.0, 18.0): ("a.new.y", "renamed"),
+    ("b.one.w", 15.0, 18.0): (None, "deleted"),
+    ("b.one.w", 15.0, 17.0): ("b.three.w", "renamed"),
+    ("c.plain.v", 15.0, 18.0): ("c.plain.v", "unchanged"),
+}
+
+
+def write_version(version: str, db_path: Path) -> None:
+    from upgrade_analysis_parser.models import ChangeRecord
+    from upgrade_analysis_parser.processing.db import insert_data, setup_database
+
+    renamed_models, renamed_fields, deleted_fields, known_fields = VERSIONS[version]
+    records = []
+    for old, new in renamed_models.items():
+        records.append(ChangeRecord(
+            version=f"{version}.1.0", module="test", change_category="MODEL", change_type="MODIFIED",
+            model_name=old, raw_line=f"model {old} renamed to {new}",
+            details_json={"rename_info": f"renamed to {new}"},
+        ))
+    for name in deleted_fields + known_fields:
+        model, _, field_name = name.rpartition(".")
+        change_type = "DEL" if name in deleted_fields else "MODIFIED"
+        records.append(ChangeRecord(
+            version=f"{version}.1.0", module="test", change_category="FIELD", change_type=change_type,
+            model_name=model, field_name=field_name, raw_line=f"test / {model} / {field_name} (char) : {change_type}",
+        ))
+    path = db_path / f"{version}.db"
+    setup_database(path)
+    insert_data(path, records)
+    with sqlite3.connect(path) as conn:
+        conn.execute(
+            "INSERT INTO migrator_data (object_type, object, module, entries_json) VALUES (?, ?, ?, ?)",
+            ("renamed", "fields", "test", json.dumps([[model, old, new, None] for model, old, new in renamed_fields])),
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="openupgrade-resolve-") as tmp:
+        db_path = Path(tmp) / "databases"
+        db_path.mkdir()
+        # config reads DB_PATH once, on the first import of the package
+        os.environ.update(DB_PATH=str(db_path), LOG_PATH=str(Path(tmp) / "logs"))
+        sys.path.insert(0, str(ROOT))
+        from upgrade_analysis_parser.processing.resolve import build_resolve_graph, resolve_name
+
+        for version in VERSIONS:
+            write_version(version, db_path)
+        build_resolve_graph()
+
+        for (name, from_version, to_version), expected in EXPECTED.items():
+            result = resolve_name("field", name, from_version, to_version)
+            got = (result["resolved_name"], result["status"])
+            print(f"{name:<12} {from_version} -> {to_version}  {got[0] or '-':<12} {got[1]}")
+            if got != expected:
+                failures.append(f"{name} from {from_version} to {to_version}: expected {expected}, got {got}")
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+    print("Fields follow renamed models through every later rename and deletion.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+"""Compare the flat `changes` table with the interned storage layout.
+
+Loads the same synthetic changes into a database with the former flat
+schema and into one created by `setup_database` (interned strings behind
+the `changes` view), then prints the file size, the pages of each table and
+index (what a warm page cache holds), and the median latency of the
+queries behind `/changes` and `/changes/bulk` on both.
+
+    python benchmarks/storage_layout.py --rows 50000 --modules 200
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from common import ROOT
+
+FLAT_SCHEMA = """
+    CREATE TABLE changes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        version TEXT NOT NULL,
+        module TEXT NOT NULL,
+        change_category TEXT NOT NULL,
+        change_type TEXT NOT NULL,
+        model_name TEXT,
+        field_name TEXT,
+        record_model TEXT,
+        xml_id TEXT,
+        description TEXT,
+        raw_line TEXT,
+        details_json TEXT
+    );
+    CREATE INDEX changes_module ON changes (module);
+    CREATE INDEX changes_model_name ON changes (model_name);
+    CREATE INDEX changes_record_model ON changes (record_model);
+"""
+
+# The statements server.py runs, with the filters of the api_bench scenarios
+QUERIES = {
+    "all": ("SELECT * FROM changes ORDER BY version DESC", ()),
+    "module": ("SELECT * FROM changes WHERE module = ? ORDER BY version DESC", ("module_0",)),
+    "model": (
+        "SELECT * FROM changes WHERE id IN (SELECT id FROM changes WHERE model_name = ?"
+        " UNION ALL SELECT id FROM changes WHERE record_model = ?) ORDER BY version DESC",
+        ("module.0.model0", "module.0.model0"),
+    ),
+    "version": (
+        "SELECT * FROM changes WHERE version >= ? AND version < ? ORDER BY version DESC",
+        ("{version}.1.1", "{version}.1.2"),
+    ),
+    "bulk": (
+        "SELECT * FROM changes WHERE id IN (SELECT id FROM changes WHERE module IN (SELECT value FROM json_each(?))"
+        " UNION SELECT id FROM changes WHERE model_name IN (SELECT value FROM json_each(?))"
+        " UNION SELECT id FROM changes WHERE record_model IN (SELECT value FROM json_each(?)))"
+        " ORDER BY module, version DESC",
+        ('["module_1", "module_2", "module_3"]', '["module.4.model0"]', '["module.4.model0"]'),
+    ),
+    "upgrade_info": (
+        "SELECT module, GROUP_CONCAT(all_models, ', ') AS all_models FROM ( SELECT DISTINCT module,"
+        " COALESCE(model_name, record_model) AS all_models FROM changes ) AS sub GROUP BY module",
+        (),
+    ),
+}
+
+
+def object_sizes(conn: sqlite3.Connection) -> dict:
+    """Bytes per table and index, when SQLite is built with the dbstat table."""
+    try:
+        return dict(conn.execute("SELECT name, SUM(pgsize) FROM dbstat GROUP BY name ORDER BY 2 DESC"))
+    except sqlite3.OperationalError:
+        return {}
+
+
+def time_queries(path: Path, version: str, repeat: int) -> dict:
+    conn = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    timings = {}
+    for name, (sql, params) in QUERIES.items():
+        params = tuple(param.format(version=version) for param in params)
+        conn.execute(sql, params).fetchall()
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            conn.execute(sql, params).fetchall()
+            samples.append(time.perf_counter() - start)
+        timings[name] = statistics.median(samples) * 1000
+    conn.close()
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--modules", type=int, default=200)
+    parser.add_argument("--version", default="18.0")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query; the median counts.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DB_PATH"] = tmp
+        sys.path.insert(0, str(ROOT))
+        from api_bench import synthetic_records
+        from upgrade_analysis_parser.processing.db import CHANGE_COLUMNS, insert_data, setup_database
+
+        records = synthetic_records(args.version, args.rows, args.modules, random.Random(args.seed))
+
+        flat_path = Path(tmp) / "flat.db"
+        with sqlite3.connect(flat_path) as conn:
+            conn.executescript(FLAT_SCHEMA)
+            conn.executemany(
+                f"INSERT INTO changes ({', '.join(CHANGE_COLUMNS)}) VALUES ({', '.join('?' * len(CHANGE_COLUMNS))})",
+                [tuple(getattr(record, column) for column in CHANGE_COLUMNS[:-1]) + (json.dumps(record.details_json),)
+                 for record in records],
+            )
+        interned_path = Path(tmp) / "interned.db"
+        setup_database(interned_path)
+        insert_data(interned_path, records)
+
+        results = {}
+        for name, path in (("flat", flat_path), ("interned", interned_path)):
+            conn = sqlite3.connect(path)
+            conn.execute("VACUUM")
+            sizes = object_sizes(conn)
+            conn.close()
+            results[name] = (path.stat().st_size, sizes, time_queries(path, args.version, args.repeat))
+
+    print(f"{args.rows} changes over {args.modules} modules")
+    for name, (size, sizes, _) in results.items():
+        print(f"\n{name}: {size / 1024:.0f} KiB on disk")
+        for object_name, object_size in sizes.items():
+            print(f"  {object_name:<28} {object_size / 1024:8.0f} KiB")
+
+    print(f"\n{'query':<14} {'flat ms':>9} {'interned ms':>12}")
+    for query in QUERIES:
+        print(f"{query:<14} {results['flat'][2][query]:9.2f} {results['interned'][2][query]:12.2f}")
+
+
+if __name__ == "__main__":
+    main()
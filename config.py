@@ -11,8 +11,31 @@ FLASK_PORT = int(os.environ.get("FLASK_PORT", 5000))
 DEBUG = os.environ.get("DEBUG", False)
 LOG_PATH = os.environ.get("LOG_PATH", "./logs")
 LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+# Rendered /changes and /upgrade_info responses kept in memory (least recently used evicted)
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", 512))
+# Response compression (gzip, and zstd when the zstandard package is installed)
+COMPRESSION_ENABLED = os.environ.get("COMPRESSION_ENABLED", "True").lower() in ("1", "true", "yes")
+COMPRESSION_MIN_SIZE = int(os.environ.get("COMPRESSION_MIN_SIZE", 1024))
+GZIP_LEVEL = int(os.environ.get("GZIP_LEVEL", 6))
+ZSTD_LEVEL = int(os.environ.get("ZSTD_LEVEL", 3))
+METRICS_ENABLED = os.environ.get("METRICS_ENABLED", "True").lower() in ("1", "true", "yes")
+# Statements slower than this (seconds) go to LOG_PATH/slow_queries.log; 0 disables
+SLOW_QUERY_THRESHOLD = float(os.environ.get("SLOW_QUERY_THRESHOLD", 0.1))
+# Per-request cProfile dumps, requested with the X-Profile header or ?_profile= (value must match PROFILING_TOKEN when set)
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "False").lower() in ("1", "true", "yes")
+PROFILING_TOKEN = os.environ.get("PROFILING_TOKEN", "")
+PROFILE_PATH = os.environ.get("PROFILE_PATH", "./logs/profiles")
 CORS_ALLOW = os.environ.get("CORS_ALLOW", "http://localhost:5001")
 
+# Production server (gunicorn.conf.py)
+SERVER_WORKERS = int(os.environ.get("SERVER_WORKERS", (os.cpu_count() or 1) * 2 + 1))
+SERVER_THREADS = int(os.environ.get("SERVER_THREADS", 4))
+SERVER_TIMEOUT = int(os.environ.get("SERVER_TIMEOUT", 60))
+SQLITE_MMAP_SIZE = int(os.environ.get("SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+# Serve reads from in-memory copies of the databases, reloaded when the files change
+DB_IN_MEMORY = os.environ.get("DB_IN_MEMORY", "False").lower() in ("1", "true", "yes")
+DB_RELOAD_INTERVAL = float(os.environ.get("DB_RELOAD_INTERVAL", 5))
+
 DB_PATH = os.environ.get("DB_PATH", "./databases")
 OPENUPGRADE_REPO_URL = os.environ.get("OPENUPGRADE_REPO_URL", "https://github.com/OCA/OpenUpgrade.git")
 OPENUPGRADE_REPO_PATH = os.environ.get("OPENUPGRADE_REPO_PATH", "./OpenUpgrade_Repo")
@@ -25,4 +48,5 @@ GOOGLE_ANALYTICS_ID = os.environ.get("GOOGLE_ANALYTICS_ID", "")
 APRIORI_VERSIONS = os.environ.get("APRIORI_VERSIONS", "12.0,13.0,14.0,15.0,16.0,17.0,18.0")
 APRIORI_INTERNAL_DOCUMENT_PATH = os.environ.get("APRIORI_INTERNAL_DOCUMENT_PATH", "./databases")
 APRIORI_INTERNAL_DOCUMENT_NAME = os.environ.get("APRIORI_INTERNAL_DOCUMENT_NAME", "")
-APRIORI_INTERNAL_DOCUMENT_URL = os.environ.get("APRIORI_INTERNAL_DOCUMENT_URL", "")
\ No newline at end of file
+APRIORI_INTERNAL_DOCUMENT_URL = os.environ.get("APRIORI_INTERNAL_DOCUMENT_URL", "")
+APRIORI_CACHE_PATH = os.environ.get("APRIORI_CACHE_PATH", "./.cache/apriori")
\ No newline at end of file
@@ -0,0 +1,35 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+# Production server settings, used with: gunicorn -c gunicorn.conf.py
+#
+# The app is preloaded in the master process and every database is read once
+# through a memory-mapped readonly connection before the workers fork. Workers
+# then open their own readonly connections per request, and the mapped pages
+# are shared through the OS page cache instead of being copied per worker.
+
+from config import FLASK_HOST, FLASK_PORT, LOG_LEVEL, SERVER_WORKERS, SERVER_THREADS, SERVER_TIMEOUT, DB_IN_MEMORY
+
+wsgi_app = "server:app"
+bind = f"{FLASK_HOST}:{FLASK_PORT}"
+workers = SERVER_WORKERS
+threads = SERVER_THREADS
+worker_class = "gthread" if SERVER_THREADS > 1 else "sync"
+timeout = SERVER_TIMEOUT
+preload_app = True
+loglevel = LOG_LEVEL.lower()
+accesslog = "-"
+
+
+def on_starting(server):
+    from upgrade_analysis_parser.processing.db import warm_databases
+
+    warm_databases()
+
+
+def post_fork(server, worker):
+    # In-memory replicas are per process, so each worker loads its own copy
+    if DB_IN_MEMORY:
+        from upgrade_analysis_parser.processing.replica import start_replicas
+
+        start_replicas()
@@ -4,16 +4,6 @@
 import argparse
 from pathlib import Path
 
-from upgrade_analysis_parser.processing.sync import clone_or_pull_repo, extract_data_for_version
-from upgrade_analysis_parser.processing.parser import run_parse_for_version
-from upgrade_analysis_parser.processing.apriori import parse_apriori
-from upgrade_analysis_parser.processing.get import (
-    generate_removed_models,
-    generate_removed_fields,
-    generate_renamed_models,
-    generate_renamed_fields,
-)
-
 from config import (
     OPENUPGRADE_REPO_URL,
     OPENUPGRADE_REPO_PATH,
@@ -68,12 +58,20 @@ def main() -> None:
 
     args = parser.parse_args()
 
+    # Each command imports only what it uses, so e.g. `get` does not pay for GitPython or requests
     if args.command == "sync":
+        from upgrade_analysis_parser.processing.sync import clone_or_pull_repo, extract_data_for_version
+
         repo = clone_or_pull_repo(OPENUPGRADE_REPO_URL, Path(OPENUPGRADE_REPO_PATH))
         for version in args.versions:
             extract_data_for_version(repo, version, Path(OPENUPGRADE_SCRIPTS_SOURCES_PATH))
 
     elif args.command == "parse":
+        from upgrade_analysis_parser.processing.parser import run_parse_for_version
+        from upgrade_analysis_parser.processing.get import store_migrator_data
+        from upgrade_analysis_parser.processing.resolve import build_resolve_graph
+        from upgrade_analysis_parser.processing.snapshot import write_snapshot
+
         for version in args.versions:
             version_scripts_path = Path(OPENUPGRADE_SCRIPTS_SOURCES_PATH) / str(version)
             if not version_scripts_path.exists():
@@ -83,12 +81,26 @@ def main() -> None:
                 logger.error(
                     f"Please run 'python manage.py sync --versions {version}' first."
                 )
-                return
+                continue
             run_parse_for_version(version, version_scripts_path)
+            store_migrator_data(version, version_scripts_path)
+            write_snapshot(version)
+        build_resolve_graph()
     elif args.command == "apriori":
+        from upgrade_analysis_parser.processing.apriori import parse_apriori
+        from upgrade_analysis_parser.processing.resolve import build_resolve_graph
+
         parse_apriori()
+        build_resolve_graph()
 
     elif args.command == "get":
+        from upgrade_analysis_parser.processing.get import (
+            generate_removed_models,
+            generate_removed_fields,
+            generate_renamed_models,
+            generate_renamed_fields,
+        )
+
         for version in args.versions:
             version_dir = Path(args.output_directory) / f"{args.object_type}_{args.object}" / f"migrate_{str(version - 1).replace('.', '')}_{str(version).replace('.', '')}"
             version_dir.mkdir(parents=True, exist_ok=True)
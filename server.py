@@ -2,18 +2,28 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
 import sqlite3
-import json, glob, re
-from flask import Flask, request, render_template
+import json, glob, re, time
+from flask import Flask, Response, g, request, render_template, send_file
 from flask_restful import abort, Api, Resource
+from flask_restful.representations.json import output_json
 from pathlib import Path
 from pydantic import ValidationError
 from config import (
-    FLASK_HOST, FLASK_PORT, DEBUG, DB_PATH, CORS_ALLOW, GOOGLE_ANALYTICS_ID, APRIORI_VERSIONS
+    FLASK_HOST, FLASK_PORT, DEBUG, DB_PATH, CORS_ALLOW, GOOGLE_ANALYTICS_ID, APRIORI_VERSIONS, DB_IN_MEMORY,
+    METRICS_ENABLED, PROFILING_ENABLED, PROFILING_TOKEN, RESPONSE_CACHE_SIZE,
 )
 
-from upgrade_analysis_parser.models import ChangeRecord
-from upgrade_analysis_parser.processing.db import sqlite_db
-from upgrade_analysis_parser.processing.apriori import get_apriori, query_apriori
+from upgrade_analysis_parser import metrics
+from upgrade_analysis_parser.compression import compress, is_compressible, negotiate
+from upgrade_analysis_parser.cache import PayloadCache
+from upgrade_analysis_parser.profiling import setup_slow_query_log, start_profiler, dump_profile
+from upgrade_analysis_parser.models import ChangeRecord, change_record_projection
+from upgrade_analysis_parser.processing.db import DETAILS_COLUMNS, sqlite_db, db_path_for_version
+from upgrade_analysis_parser.processing.get import fetch_migrator_data, format_yaml_entries
+from upgrade_analysis_parser.processing.replica import get_replicas, start_replicas
+from upgrade_analysis_parser.processing.snapshot import SNAPSHOT_FORMATS, read_manifest, snapshot_path
+from upgrade_analysis_parser.processing.resolve import RESOLVE_KINDS, resolve_name
+from upgrade_analysis_parser.processing.apriori import get_apriori, query_apriori, search_apriori, get_module_index
 
 import logging
 
@@ -23,6 +33,9 @@ logger = logging.getLogger(__name__)
 app = Flask(__name__)
 api = Api(app)
 app_name = 'openupgrade-api'
+migrator_cache = PayloadCache("migrator", max_entries=RESPONSE_CACHE_SIZE)
+response_cache = PayloadCache("responses", max_entries=RESPONSE_CACHE_SIZE)
+setup_slow_query_log()
 
 # Add headers to all responses
 @app.after_request
@@ -37,70 +50,473 @@ def add_headers(response):
     response.headers['X-Application-Name'] = app_name
     return response
 
+def _route():
+    return request.url_rule.rule if request.url_rule else "unmatched"
+
+def _major_version(status=None):
+    """Label value for the requested version; `other` for errors and unknown versions, so clients cannot grow it."""
+    version = (request.view_args or {}).get('major_version')
+    if version is None:
+        return ''
+    if (status is not None and status >= 400) or not db_path_for_version(version).exists():
+        return 'other'
+    return str(version)
+
+def _stage(stage):
+    return metrics.timed_stage(_route(), stage)
+
+def _count_rows(count):
+    metrics.ROWS_RETURNED.inc(count, route=_route(), major_version=_major_version())
+
+if METRICS_ENABLED:
+    @app.before_request
+    def start_timer():
+        g.request_start = time.perf_counter()
+
+    @app.after_request
+    def record_request_metrics(response):
+        route, major_version = _route(), _major_version(response.status_code)
+        metrics.REQUESTS.inc(route=route, major_version=major_version, method=request.method, status=response.status_code)
+        if 'request_start' in g:
+            metrics.REQUEST_SECONDS.observe(time.perf_counter() - g.request_start, route=route, major_version=major_version)
+        if response.content_length is not None:
+            metrics.RESPONSE_BYTES.inc(response.content_length, route=route, major_version=major_version)
+        return response
+
+if PROFILING_ENABLED:
+    @app.before_request
+    def start_request_profile():
+        flag = request.headers.get('X-Profile') or request.args.get('_profile')
+        if flag and (not PROFILING_TOKEN or flag == PROFILING_TOKEN):
+            g.profiler = start_profiler()
+
+    @app.after_request
+    def dump_request_profile(response):
+        profiler = g.pop('profiler', None)
+        if profiler:
+            path = dump_profile(profiler, f"{request.method} {request.path}")
+            response.headers['X-Profile-File'] = path.name
+        return response
+
+@app.after_request
+def compress_response(response):
+    """Compress dynamic responses; cached payloads arrive already encoded."""
+    if (
+        response.status_code != 200
+        or response.direct_passthrough
+        or 'Content-Encoding' in response.headers
+        or not is_compressible(response.mimetype, response.content_length or 0)
+    ):
+        return response
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate(request.accept_encodings)
+    if encoding:
+        response.set_data(compress(response.get_data(), encoding))
+        response.headers['Content-Encoding'] = encoding
+    return response
+
+@api.representation('application/json')
+def timed_output_json(data, code, headers=None):
+    with _stage("serialize"):
+        return output_json(data, code, headers)
+
+# Query parameters of /changes matched exactly against the column of the same name (all indexed)
+EXACT_FILTERS = ("module", "change_category", "change_type", "field_name", "xml_id") + tuple(DETAILS_COLUMNS)
+
+
 class ChangesResource(Resource):
     def get(self, major_version: float):
-        module_filter = request.args.get('module')
+        filters = tuple((name, request.args[name]) for name in EXACT_FILTERS if request.args.get(name))
         model_filter = request.args.get('model')
         minor_version_filter = request.args.get('version')
+        fields = _parse_fields(request.args.get('fields'))
 
-        try:
-            with sqlite_db(major_version) as cursor:
-                query = "SELECT * FROM changes WHERE 1=1"
-                params = []
+        db_path = db_path_for_version(major_version)
+        if not db_path.exists():
+            abort(404, message=f"No data for version {major_version}. Please run 'python manage.py parse --versions {major_version}' first.")
 
-                if module_filter:
-                    query += " AND module = ?"
-                    params.append(module_filter)
+        key = (major_version, filters, model_filter, minor_version_filter, fields)
+        payload = response_cache.get_or_build(
+            ("changes",) + key, db_path, lambda: _render_json(_query_changes(*key))
+        )
+        return _cached_response(payload)
 
-                if model_filter:
-                    query += " AND (model_name = ? OR record_model = ?)"
-                    params.extend([model_filter, model_filter])
 
-                if minor_version_filter:
-                    query += " AND version LIKE ?"
-                    params.append(f"{minor_version_filter}%")
+def _parse_fields(value):
+    """Validate a `fields=a,b` projection; return the names in ChangeRecord order, or None for all."""
+    if not value:
+        return None
+    requested = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = requested - set(ChangeRecord.model_fields)
+    if unknown:
+        abort(400, message=f"Unknown fields: {', '.join(sorted(unknown))}. Allowed: {', '.join(ChangeRecord.model_fields)}.")
+    return tuple(name for name in ChangeRecord.model_fields if name in requested) or None
 
-                query += " ORDER BY version DESC"
 
-                cursor.execute(query, tuple(params))
-                rows = cursor.fetchall()
-        except sqlite3.Error as e:
+def _query_changes(major_version, filters, model_filter, minor_version_filter, fields=None):
+    try:
+        with _stage("db"), sqlite_db(major_version, readonly=True) as cursor:
+            # Column names come from ChangeRecord fields (see _parse_fields), never from the request as-is
+            query = f"SELECT {', '.join(fields) if fields else '*'} FROM changes WHERE 1=1"
+            params = []
+
+            for column, value in filters:
+                query += f" AND {column} = ?"
+                params.append(value)
+
+            if model_filter:
+                # A UNION lets each branch use its own index; an OR across the two interned columns would scan
+                query += " AND id IN (SELECT id FROM changes WHERE model_name = ? UNION ALL SELECT id FROM changes WHERE record_model = ?)"
+                params.extend([model_filter, model_filter])
+
+            if minor_version_filter:
+                query += " AND version >= ? AND version < ?"
+                params.extend(_prefix_range(minor_version_filter))
+
+            query += " ORDER BY version DESC"
+
+            cursor.execute(query, tuple(params))
+            rows = cursor.fetchall()
+    except sqlite3.Error as e:
+        abort(500, message=f"Database error occurred: {str(e)}")
+
+    _count_rows(len(rows))
+    if not rows:
+        return []
+
+    return _serialize_changes(rows, fields)
+
+
+def _prefix_range(prefix):
+    """Bounds of the values starting with `prefix`, as a range the index on interned strings can serve."""
+    return prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+def _render_json(data):
+    """Encode `data` the way Flask-RESTful would, for storage in a PayloadCache."""
+    with _stage("serialize"):
+        body = json.dumps(data, **app.config.get('RESTFUL_JSON', {})) + "\n"
+    return body.encode("utf-8"), "application/json"
+
+
+def _serialize_changes(rows, fields=None):
+    """Validate change rows through ChangeRecord and dump them as plain dicts.
+
+    With `fields`, rows only hold those columns and are validated against a
+    projection of ChangeRecord instead.
+    """
+    try:
+        with _stage("validate"):
+            return _validate_changes(rows, change_record_projection(fields) if fields else ChangeRecord)
+    except ValidationError as e:
+        abort(500, message=f"Data validation error: {e}")
+    except Exception as e:
+        abort(500, message=f"An unexpected processing error occurred: {str(e)}")
+
+
+def _validate_changes(rows, model):
+    validated_changes = []
+    for row in rows:
+        data_dict = dict(row)
+        if data_dict.get('details_json') and isinstance(data_dict['details_json'], str):
+            data_dict['details_json'] = json.loads(data_dict['details_json'])
+
+        validated_changes.append(model.model_validate(data_dict))
+
+    return [record.model_dump() for record in validated_changes]
+
+
+class ChangesSinceResource(Resource):
+    """Net changes since a build, so clients can update a local copy without a full reload.
+
+    Apply `removed` first, then `added` (rows are keyed on their raw_line).
+    """
+
+    def get(self, major_version: float):
+        build = request.args.get('build')
+        if not build:
+            abort(400, message="Parameter 'build' is required.")
+
+        db_path = db_path_for_version(major_version)
+        if not db_path.exists():
+            abort(404, message=f"No data for version {major_version}. Please run 'python manage.py parse --versions {major_version}' first.")
+
+        payload = response_cache.get_or_build(
+            ("changes_since", major_version, build), db_path, lambda: _render_json(_query_changes_since(major_version, build))
+        )
+        return _cached_response(payload)
+
+
+def _query_changes_since(major_version, build):
+    try:
+        with _stage("db"), sqlite_db(major_version, readonly=True) as cursor:
+            start = cursor.execute("SELECT seq FROM builds WHERE build = ?", (build,)).fetchone()
+            if start is None:
+                abort(404, message=f"Unknown build '{build}' for version {major_version}. Reload from /{major_version}/snapshot.")
+            builds = cursor.execute(
+                "SELECT build, created_at, row_count, added, removed FROM builds WHERE seq > ? ORDER BY seq",
+                (start["seq"],),
+            ).fetchall()
+            rows = cursor.execute(
+                "SELECT change_log.*, builds.build, builds.created_at FROM change_log"
+                " JOIN builds ON builds.seq = change_log.build_seq"
+                " WHERE change_log.build_seq > ? ORDER BY change_log.id",
+                (start["seq"],),
+            ).fetchall()
+    except sqlite3.OperationalError as e:
+        if "no such table" not in str(e):
             abort(500, message=f"Database error occurred: {str(e)}")
+        abort(404, message=f"No change log for version {major_version}. Please run 'python manage.py parse --versions {major_version}' again.")
+    except sqlite3.Error as e:
+        abort(500, message=f"Database error occurred: {str(e)}")
+    _count_rows(len(rows))
+
+    # Only the net effect per row counts: added then removed again cancels out
+    first, last = {}, {}
+    for row in rows:
+        first.setdefault(row["line_hash"], row)
+        last[row["line_hash"]] = row
+    net = {"added": [], "removed": []}
+    for key, row in last.items():
+        if row["action"] == "added" or first[key]["action"] == "removed":
+            net[row["action"]].append(row)
+
+    response = {
+        "since": build,
+        "build": builds[-1]["build"] if builds else build,
+        "builds": [dict(row) for row in builds],
+    }
+    for action, action_rows in net.items():
+        response[action] = [
+            {"build": row["build"], "created_at": row["created_at"], "change": change}
+            for row, change in zip(action_rows, _serialize_changes(action_rows))
+        ]
+    return response
+
+
+class BulkChangesResource(Resource):
+    """Changes for a whole list of modules and/or models in a single query.
+
+    Body: {"modules": [...], "models": [...], "version": "18.0.1", "counts_only": false}.
+    A change is returned when it matches any of the given modules or models.
+    """
+
+    def post(self, major_version: float):
+        payload = request.get_json(silent=True)
+        if not isinstance(payload, dict):
+            abort(400, message="Request body must be a JSON object.")
+
+        names = {}
+        for key in ("modules", "models"):
+            value = payload.get(key) or []
+            if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+                abort(400, message=f"'{key}' must be a list of strings.")
+            names[key] = json.dumps(value)
+        if names["modules"] == "[]" and names["models"] == "[]":
+            abort(400, message="At least one of 'modules' or 'models' is required.")
+        minor_version_filter = payload.get('version')
+        counts_only = bool(payload.get('counts_only'))
 
-        if not rows:
-            return [], 200
+        where = """
+            id IN (SELECT id FROM changes WHERE module IN (SELECT value FROM json_each(:modules))
+                   UNION SELECT id FROM changes WHERE model_name IN (SELECT value FROM json_each(:models))
+                   UNION SELECT id FROM changes WHERE record_model IN (SELECT value FROM json_each(:models)))
+        """
+        params = dict(names)
+        if minor_version_filter:
+            where += " AND version >= :version_from AND version < :version_to"
+            params["version_from"], params["version_to"] = _prefix_range(str(minor_version_filter))
 
         try:
-            validated_changes = []
-            for row in rows:
-                data_dict = dict(row)
-                if data_dict.get('details_json') and isinstance(data_dict['details_json'], str):
-                    data_dict['details_json'] = json.loads(data_dict['details_json'])
+            with _stage("db"), sqlite_db(major_version, readonly=True) as cursor:
+                if counts_only:
+                    cursor.execute(
+                        f"SELECT module, change_category, COUNT(*) AS count FROM changes WHERE {where}"
+                        " GROUP BY module, change_category",
+                        params,
+                    )
+                else:
+                    cursor.execute(f"SELECT * FROM changes WHERE {where} ORDER BY module, version DESC", params)
+                rows = cursor.fetchall()
+        except sqlite3.Error as e:
+            abort(500, message=f"Database error occurred: {str(e)}")
+        _count_rows(len(rows))
 
-                validated_changes.append(ChangeRecord.model_validate(data_dict))
+        # Requested modules without any change are listed too, so callers see they were checked
+        requested_modules = json.loads(names["modules"])
+        if counts_only:
+            response = {module: {"total": 0} for module in requested_modules}
+            for row in rows:
+                counts = response.setdefault(row["module"], {"total": 0})
+                counts[row["change_category"]] = row["count"]
+                counts["total"] += row["count"]
+            return response
 
-            response_data = [record.model_dump() for record in validated_changes]
-            return response_data
-        except ValidationError as e:
-            abort(500, message=f"Data validation error: {e}")
-        except Exception as e:
-            abort(500, message=f"An unexpected processing error occurred: {str(e)}")
+        response = {module: [] for module in requested_modules}
+        for record in _serialize_changes(rows):
+            response.setdefault(record["module"], []).append(record)
+        return response
 
 
 class Apriori(Resource):
-    def get(self, version: None):
+    def get(self, version=None):
         query = request.args.get('q')
         only_table = request.args.get('table')
         if only_table not in ["renamed_modules", "merged_modules"]:
             only_table = None
+        mode = request.args.get('mode')
         if query:
             logger.info(f"GET {request.full_path}")
+            if mode in ("prefix", "fuzzy"):
+                limit = request.args.get('limit', 50, type=int)
+                if limit < 1:
+                    abort(400, message="Parameter 'limit' must be a positive integer.")
+                return search_apriori(query, mode, only_table, limit)
             return query_apriori(query, only_table)
         logger.info(f"GET {request.path}")
         apriori = get_apriori(version, only_table)
         return apriori
 
+class MigratorResource(Resource):
+    """Removed/renamed models and fields in the odoo-module-migrator format."""
+
+    def get(self, major_version: float, object_type: str, object: str):
+        # Models datasets are not split by module (they are stored under module '')
+        module_filter = request.args.get('module') if object == "fields" else None
+        output_format = request.args.get('format')
+        if output_format not in ("json", "yaml"):
+            best = request.accept_mimetypes.best_match(
+                ["application/json", "application/yaml", "text/yaml"], default="application/json"
+            )
+            output_format = "json" if best == "application/json" else "yaml"
+
+        db_path = db_path_for_version(major_version)
+        if not db_path.exists():
+            abort(404, message=f"No data for version {major_version}. Please run 'python manage.py parse --versions {major_version}' first.")
+
+        key = (major_version, object_type, object, module_filter, output_format)
+        try:
+            payload = migrator_cache.get_or_build(
+                key, db_path, lambda: _render_migrator_data(major_version, object_type, object, module_filter, output_format)
+            )
+        except sqlite3.OperationalError as e:
+            if "no such table" not in str(e):
+                abort(500, message=f"Database error occurred: {str(e)}")
+            abort(404, message=f"No precomputed data for version {major_version}. Please run 'python manage.py parse --versions {major_version}' again.")
+        except sqlite3.Error as e:
+            abort(500, message=f"Database error occurred: {str(e)}")
+
+        return _cached_response(payload)
+
+
+def _cached_response(payload):
+    """Send a cached payload, reusing its stored compressed body when the client accepts one."""
+    encoding = negotiate(request.accept_encodings) if is_compressible(payload.mimetype, len(payload.body)) else None
+    # Each encoding is a distinct representation, so it gets its own ETag
+    etag = f"{payload.etag}-{encoding}" if encoding else payload.etag
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        response = Response(payload.body_for(encoding), mimetype=payload.mimetype)
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.set_etag(etag)
+    if is_compressible(payload.mimetype, len(payload.body)):
+        response.vary.add('Accept-Encoding')
+    return response
+
+
+def _render_migrator_data(major_version, object_type, object, module, output_format):
+    with _stage("db"), sqlite_db(major_version, readonly=True) as cursor:
+        by_module = fetch_migrator_data(cursor, object_type, object, module)
+
+    if object == "models":
+        data = by_module.get("", [])
+    elif module:
+        data = by_module.get(module, [])
+    else:
+        data = by_module
+
+    if output_format == "yaml":
+        if isinstance(data, dict):
+            body = "".join(f"{mod}:\n" + format_yaml_entries(object_type, object, entries) for mod, entries in data.items())
+        else:
+            body = format_yaml_entries(object_type, object, data)
+        return body.encode("utf-8"), "application/yaml"
+    return json.dumps(data).encode("utf-8"), "application/json"
+
+
+class SnapshotResource(Resource):
+    """Whole-version export written by `manage.py parse`, sent straight from disk."""
+
+    def get(self, major_version: float):
+        fmt = request.args.get('format', 'ndjson')
+        if fmt not in SNAPSHOT_FORMATS:
+            abort(400, message=f"Parameter 'format' must be one of: {', '.join(SNAPSHOT_FORMATS)}.")
+        path = snapshot_path(major_version, fmt)
+        try:
+            manifest = read_manifest(major_version)
+        except (OSError, ValueError):
+            manifest = None
+        if not manifest or not path.exists():
+            abort(404, message=f"No snapshot for version {major_version}. Please run 'python manage.py parse --versions {major_version}' first.")
+
+        # send_file handles If-None-Match and Range requests and streams the file without touching rows
+        response = send_file(
+            path.resolve(),
+            mimetype=SNAPSHOT_FORMATS[fmt][1],
+            as_attachment=True,
+            download_name=path.name,
+            etag=manifest["files"][fmt]["sha256"],
+            conditional=True,
+        )
+        response.headers['X-Snapshot-Build'] = manifest["build"]
+        response.headers['X-Snapshot-Rows'] = str(manifest["rows"])
+        return response
+
+
+class ResolveResource(Resource):
+    """Follow a model, field, xml_id or module through renames across several versions."""
+
+    def get(self):
+        kind = request.args.get('kind')
+        name = request.args.get('name')
+        if kind not in RESOLVE_KINDS:
+            abort(400, message=f"Parameter 'kind' must be one of: {', '.join(RESOLVE_KINDS)}.")
+        if not name:
+            abort(400, message="Parameter 'name' is required.")
+        try:
+            from_version = float(request.args.get('from', ''))
+            to_version = float(request.args.get('to', ''))
+        except ValueError:
+            abort(400, message="Parameters 'from' and 'to' must be versions such as 14.0.")
+        if from_version >= to_version:
+            abort(400, message="Parameter 'from' must be lower than 'to'.")
+
+        try:
+            with _stage("db"):
+                return resolve_name(kind, name, from_version, to_version)
+        except OSError:
+            abort(404, message="Rename graph not found. Please run 'python manage.py parse' first.")
+        except sqlite3.Error as e:
+            abort(500, message=f"Database error occurred: {str(e)}")
+
+
+# Build the apriori module name index at startup rather than on the first search
+try:
+    get_module_index()
+except OSError:
+    logger.warning("apriori.db not found, module search will be unavailable until 'python manage.py apriori' runs.")
+
 api.add_resource(ChangesResource, '/<float:major_version>/changes')
+api.add_resource(BulkChangesResource, '/<float:major_version>/changes/bulk')
+api.add_resource(ChangesSinceResource, '/<float:major_version>/changes/since')
+api.add_resource(SnapshotResource, '/<float:major_version>/snapshot')
+api.add_resource(
+    MigratorResource,
+    '/<float:major_version>/<any(removed, renamed):object_type>/<any(models, fields):object>',
+)
+api.add_resource(ResolveResource, '/resolve')
 api.add_resource(Apriori, '/api/apriori', '/api/apriori/<string:version>', '/api/apriori/<string:version>/')
 
 @app.route('/')
@@ -109,13 +525,16 @@ def index():
 
 @app.route('/upgrade_info')
 def upgrade_info():
-    support_versions = [re.search(r'(\d*\.\d+)\.db$', f).group(1)
-         for f in glob.glob(f'{DB_PATH}/*.db')
-         if re.search(r'(\d*\.\d+)\.db$', f)]
+    db_files = sorted(Path(f) for f in glob.glob(f'{DB_PATH}/*.db') if re.search(r'(\d*\.\d+)\.db$', f))
+    payload = response_cache.get_or_build(("upgrade_info",), db_files, lambda: _render_upgrade_info(db_files))
+    return _cached_response(payload)
+
+def _render_upgrade_info(db_files):
+    support_versions = [re.search(r'(\d*\.\d+)\.db$', str(f)).group(1) for f in db_files]
 
     response = {}
     for version in support_versions:
-        with sqlite_db(version) as cursor:
+        with _stage("db"), sqlite_db(version, readonly=True) as cursor:
             query = "SELECT module, GROUP_CONCAT(all_models, ', ') AS all_models FROM ( SELECT DISTINCT module, COALESCE(model_name, record_model) AS all_models FROM changes ) AS sub GROUP BY module;"
 
             cursor.execute(query)
@@ -123,13 +542,31 @@ def upgrade_info():
 
             data = [dict(row) for row in rows]
             response[version] = data
+        _count_rows(len(rows))
 
-    return response
+    with _stage("serialize"):
+        # Same compact output as jsonify outside debug mode
+        body = app.json.dumps(response, separators=(",", ":")) + "\n"
+    return body.encode("utf-8"), "application/json"
 
 @app.route('/api/apriori/support_versions')
 def support_version():
     support_version = APRIORI_VERSIONS.split(',')
     return json.dumps(support_version)
 
+@app.route('/replicas')
+def replicas():
+    """Memory used by each in-memory database replica, next to its file size."""
+    manager = get_replicas()
+    return {"enabled": manager is not None, "databases": manager.report() if manager else {}}
+
+if METRICS_ENABLED:
+    @app.route('/metrics')
+    def prometheus_metrics():
+        """Metrics of this process in the Prometheus text format."""
+        return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
 if __name__ == '__main__':
+    if DB_IN_MEMORY:
+        start_replicas()
     app.run(host=FLASK_HOST, port=FLASK_PORT, debug=DEBUG)
\ No newline at end of file
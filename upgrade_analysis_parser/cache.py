@@ -0,0 +1,137 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import hashlib
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from collections import OrderedDict
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple, Union
+
+from .compression import compress
+from .metrics import CACHE_REQUESTS, COALESCED_REQUESTS
+from .processing.replica import data_stamp
+
+
+# A database file, or every file a payload was built from
+Sources = Union[Path, Sequence[Path]]
+Stamp = Tuple[Tuple[str, int, int], ...]
+
+
+@dataclass(frozen=True)
+class CachedPayload:
+    """A rendered response body ready to be sent as-is.
+
+    Compressed variants are built on first use and kept next to the body, so a
+    cached payload is compressed at most once per encoding.
+    """
+    body: bytes
+    mimetype: str
+    etag: str
+    encoded: Dict[str, bytes] = field(default_factory=dict, compare=False)
+
+    def body_for(self, encoding: Optional[str]) -> bytes:
+        if not encoding:
+            return self.body
+        body = self.encoded.get(encoding)
+        if body is None:
+            body = self.encoded[encoding] = compress(self.body, encoding)
+        return body
+
+
+class _Flight:
+    """A build in progress, shared by every thread that missed on the same key and stamp."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.payload: Optional[CachedPayload] = None
+        self.error: Optional[BaseException] = None
+
+
+class PayloadCache:
+    """In-memory cache of rendered payloads keyed by request parameters.
+
+    Each entry remembers the (mtime, size) stamps of the database files it was
+    built from, so rebuilding a database through `manage.py parse` invalidates it.
+    With in-memory replicas, the stamp is the one of the loaded replica instead.
+    With `max_entries`, the least recently used entries are evicted first.
+    Concurrent misses on the same key share a single build.
+    """
+
+    def __init__(self, name: str, max_entries: Optional[int] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[Stamp, CachedPayload]]" = OrderedDict()
+        self._flights: Dict[Tuple[Hashable, Stamp], _Flight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stamp(sources: Sources) -> Stamp:
+        if isinstance(sources, Path):
+            sources = (sources,)
+        stamp = []
+        for source in sources:
+            stamp.append((str(source),) + data_stamp(source))
+        return tuple(stamp)
+
+    def get(self, key: Hashable, sources: Sources) -> Optional[CachedPayload]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry:
+                self._entries.move_to_end(key)
+        if entry and entry[0] == self._stamp(sources):
+            CACHE_REQUESTS.inc(cache=self.name, result="hit")
+            return entry[1]
+        CACHE_REQUESTS.inc(cache=self.name, result="miss")
+        return None
+
+    def get_or_build(self, key: Hashable, sources: Sources, build: Callable[[], Tuple[bytes, str]]) -> CachedPayload:
+        """Return the cached payload for `key`, building it with `build()` on a miss.
+
+        Only one thread builds a given key for a given stamp; the others wait for
+        its payload, or get its exception raised again.
+        """
+        payload = self.get(key, sources)
+        if payload is not None:
+            return payload
+        stamp = self._stamp(sources)
+        with self._lock:
+            # An identical build may have finished between the lookup above and now
+            entry = self._entries.get(key)
+            if entry and entry[0] == stamp:
+                COALESCED_REQUESTS.inc(cache=self.name)
+                return entry[1]
+            flight = self._flights.get((key, stamp))
+            leader = flight is None
+            if leader:
+                flight = self._flights[(key, stamp)] = _Flight()
+
+        if not leader:
+            COALESCED_REQUESTS.inc(cache=self.name)
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.payload
+
+        try:
+            body, mimetype = build()
+            payload = CachedPayload(body=body, mimetype=mimetype, etag=hashlib.sha1(body).hexdigest())
+            with self._lock:
+                self._entries[key] = (stamp, payload)
+                self._entries.move_to_end(key)
+                if self.max_entries is not None:
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            flight.payload = payload
+            return payload
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[(key, stamp)]
+            flight.done.set()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
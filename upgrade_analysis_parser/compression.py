@@ -0,0 +1,41 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import gzip
+from typing import Optional
+
+from config import COMPRESSION_ENABLED, COMPRESSION_MIN_SIZE, GZIP_LEVEL, ZSTD_LEVEL
+
+try:
+    import zstandard
+except ImportError:  # optional, gzip only without it
+    zstandard = None
+
+# Preferred first when the client accepts several
+ENCODINGS = ("zstd", "gzip") if zstandard else ("gzip",)
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "application/yaml", "text/")
+
+
+def is_compressible(mimetype: Optional[str], size: int) -> bool:
+    return (
+        COMPRESSION_ENABLED
+        and size >= COMPRESSION_MIN_SIZE
+        and bool(mimetype)
+        and mimetype.startswith(COMPRESSIBLE_MIMETYPES)
+    )
+
+
+def negotiate(accept_encodings) -> Optional[str]:
+    """Pick the encoding to use from a werkzeug `request.accept_encodings`."""
+    if not COMPRESSION_ENABLED:
+        return None
+    return accept_encodings.best_match(ENCODINGS)
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    raise ValueError(f"Unsupported encoding: {encoding}")
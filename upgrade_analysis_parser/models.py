@@ -1,8 +1,9 @@
 # Copyright 2025 Trobz
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
-from pydantic import BaseModel, Field
-from typing import Optional, Dict, Any
+from functools import lru_cache
+from pydantic import BaseModel, Field, create_model
+from typing import Optional, Dict, Any, Tuple, Type
 
 class ChangeRecord(BaseModel):
     """Defines the data structure for a single change record using Pydantic."""
@@ -17,3 +18,12 @@ class ChangeRecord(BaseModel):
     xml_id: Optional[str] = None
     description: Optional[str] = None
     details_json: Dict[str, Any] = Field(default_factory=dict)
+
+
+@lru_cache(maxsize=None)
+def change_record_projection(fields: Tuple[str, ...]) -> Type[BaseModel]:
+    """Return a model holding only `fields` of ChangeRecord, with the same types and defaults."""
+    return create_model(
+        "ChangeRecordProjection",
+        **{name: (ChangeRecord.model_fields[name].annotation, ChangeRecord.model_fields[name]) for name in fields},
+    )
@@ -1,9 +1,22 @@
 # Copyright 2025 Trobz
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
 
-import requests, os, csv
+import os, csv, ast, json, hashlib, bisect, difflib, threading
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
 from .db import sqlite_db
-from config import APRIORI_VERSIONS, APRIORI_INTERNAL_DOCUMENT_PATH, APRIORI_INTERNAL_DOCUMENT_NAME, APRIORI_INTERNAL_DOCUMENT_URL
+from .replica import data_stamp
+from ..metrics import CACHE_REQUESTS
+from config import (
+    APRIORI_VERSIONS, APRIORI_INTERNAL_DOCUMENT_PATH, APRIORI_INTERNAL_DOCUMENT_NAME, APRIORI_INTERNAL_DOCUMENT_URL,
+    APRIORI_CACHE_PATH, DB_PATH,
+)
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
 
 def _fetch_apriori_from_db(cursor, table, key_col, value_col, filter_col, filter_val):
     rows = cursor.execute(
@@ -39,7 +52,7 @@ def _fetch_apriori_from_csv(path, version=None, query=None):
 
 def get_apriori(version, only_table = None):
     apriori = {}
-    with sqlite_db('apriori') as cursor:
+    with sqlite_db('apriori', readonly=True) as cursor:
         if only_table in (None, "renamed_modules"):
             apriori["renamed_modules"] = _fetch_apriori_from_db(cursor, "renamed_modules", "old_name", "new_name", "version", version)
 
@@ -54,7 +67,7 @@ def get_apriori(version, only_table = None):
 
 def query_apriori(query, only_table = None):
     apriori = {}
-    with sqlite_db('apriori') as cursor:
+    with sqlite_db('apriori', readonly=True) as cursor:
         if only_table in (None, "renamed_modules"):
             apriori["renamed_modules"] = _fetch_apriori_from_db(cursor, "renamed_modules", "version", "new_name", "old_name", query)
 
@@ -66,38 +79,196 @@ def query_apriori(query, only_table = None):
 
     return apriori
 
+class ModuleNameIndex:
+    """Sorted in-memory index of every module name found in the apriori tables.
+
+    Supports prefix lookups through bisect and fuzzy lookups through difflib, and
+    keeps the rename/merge events of each name to rebuild its chain across versions.
+    """
+
+    def __init__(self, renamed_rows, merged_rows):
+        self.events = defaultdict(list)
+        for table, rows in (("renamed_modules", renamed_rows), ("merged_modules", merged_rows)):
+            for version, from_name, to_name in rows:
+                event = (version, table, from_name, to_name)
+                self.events[from_name].append(event)
+                self.events[to_name].append(event)
+        self.names = sorted(self.events)
+
+    def prefix(self, query, limit):
+        start = bisect.bisect_left(self.names, query)
+        matches = []
+        for name in self.names[start:start + limit]:
+            if not name.startswith(query):
+                break
+            matches.append(name)
+        return matches
+
+    def fuzzy(self, query, limit):
+        return difflib.get_close_matches(query, self.names, n=limit, cutoff=0.6)
+
+    def chain(self, name):
+        """Renames/merges leading to `name` and away from it, ordered by version.
+
+        Names reached going forward are only followed forward and names reached
+        going back only backward, so modules merged into the same target as
+        `name` are not part of its chain.
+        """
+        events = set()
+        # Event positions of the from/to names: forward along from -> to, then backward
+        for source, target in ((2, 3), (3, 2)):
+            seen_names, todo = {name}, [name]
+            while todo:
+                current = todo.pop()
+                for event in self.events[current]:
+                    if event[source] != current:
+                        continue
+                    events.add(event)
+                    if event[target] not in seen_names:
+                        seen_names.add(event[target])
+                        todo.append(event[target])
+        return [
+            {"version": version, "table": table, "from": from_name, "to": to_name}
+            for version, table, from_name, to_name in sorted(events, key=lambda e: (float(e[0]), e[2]))
+        ]
+
+    def lookup(self, name, only_table=None):
+        """Same shape as `query_apriori` for one name, plus its full chain."""
+        result = {}
+        for table in ("renamed_modules", "merged_modules"):
+            if only_table in (None, table):
+                result[table] = {
+                    version: to_name
+                    for version, event_table, from_name, to_name in self.events[name]
+                    if event_table == table and from_name == name
+                }
+        result["chain"] = self.chain(name)
+        return result
+
+
+_module_index = None
+_module_index_lock = threading.Lock()
+
+def get_module_index():
+    """Return the module name index, rebuilding it when apriori.db was replaced."""
+    global _module_index
+    stamp = data_stamp(Path(DB_PATH) / "apriori.db")
+    with _module_index_lock:
+        if _module_index is None or _module_index[0] != stamp:
+            CACHE_REQUESTS.inc(cache="apriori_module_index", result="miss")
+            with sqlite_db('apriori', readonly=True) as cursor:
+                renamed_rows = cursor.execute("SELECT version, old_name, new_name FROM renamed_modules").fetchall()
+                merged_rows = cursor.execute("SELECT version, from_name, to_name FROM merged_modules").fetchall()
+            _module_index = (stamp, ModuleNameIndex(renamed_rows, merged_rows))
+            logger.info(f"Built apriori module index with {len(_module_index[1].names)} names.")
+        else:
+            CACHE_REQUESTS.inc(cache="apriori_module_index", result="hit")
+        return _module_index[1]
+
+def search_apriori(query, mode, only_table=None, limit=50):
+    """Find module names by `prefix` or `fuzzy` match, keyed by matched name."""
+    index = get_module_index()
+    names = index.prefix(query, limit) if mode == "prefix" else index.fuzzy(query, limit)
+    return {name: index.lookup(name, only_table) for name in names}
+
 def parse_apriori():
-    versions = APRIORI_VERSIONS.split(',')
-    with sqlite_db('apriori', clean=True) as cursor:
-        # After clean, we need to create schema
-        make_schema(cursor)
-
-        for version in versions:
-            version = version.strip()
-            try:
-                url = get_url(version)
-            except ValueError:
-                continue
-            r = requests.get(url)
-            r.raise_for_status()
-            _globals = {}
-            _locals = {}
-            exec(r.text, _globals, _locals)
-            for old_name, new_name in _locals["renamed_modules"].items():
-                cursor.execute(
-                    'INSERT INTO renamed_modules (version, old_name, new_name) VALUES (?, ?, ?)',
-                    (version, old_name, new_name)
-                )
-            for from_name, to_name in _locals["merged_modules"].items():
-                cursor.execute(
-                    'INSERT INTO merged_modules (version, from_name, to_name) VALUES (?, ?, ?)',
-                    (version, from_name, to_name)
-                )
+    versions = []
+    for version in APRIORI_VERSIONS.split(','):
+        version = version.strip()
+        try:
+            versions.append((version, get_url(version)))
+        except ValueError:
+            continue
+
+    with make_session(pool_size=len(versions)) as session:
+        with ThreadPoolExecutor(max_workers=max(len(versions), 1)) as executor:
+            sources = list(executor.map(lambda item: fetch_cached(session, item[1]), versions))
+
+        renamed_rows, merged_rows = [], []
+        for (version, _), source in zip(versions, sources):
+            values = extract_literals(source, ("renamed_modules", "merged_modules"))
+            renamed_rows.extend((version, old_name, new_name) for old_name, new_name in values["renamed_modules"].items())
+            merged_rows.extend((version, from_name, to_name) for from_name, to_name in values["merged_modules"].items())
+
+        with sqlite_db('apriori', clean=True) as cursor:
+            # After clean, we need to create schema
+            make_schema(cursor)
+            cursor.executemany(
+                'INSERT INTO renamed_modules (version, old_name, new_name) VALUES (?, ?, ?)', renamed_rows
+            )
+            cursor.executemany(
+                'INSERT INTO merged_modules (version, from_name, to_name) VALUES (?, ?, ?)', merged_rows
+            )
+        logger.info(f"Stored {len(renamed_rows)} renamed and {len(merged_rows)} merged modules for {len(versions)} versions.")
 
         if APRIORI_INTERNAL_DOCUMENT_PATH and APRIORI_INTERNAL_DOCUMENT_NAME and APRIORI_INTERNAL_DOCUMENT_URL:
             csv_path = os.path.join(APRIORI_INTERNAL_DOCUMENT_PATH, APRIORI_INTERNAL_DOCUMENT_NAME)
-            download(csv_path, APRIORI_INTERNAL_DOCUMENT_URL)
-            
+            download(csv_path, APRIORI_INTERNAL_DOCUMENT_URL, session)
+
+def make_session(pool_size=10):
+    # requests is only needed by `manage.py apriori`; importing it here keeps it out of the server
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def fetch_cached(session, url):
+    """Fetch `url` as text, revalidating a local copy with ETag/Last-Modified.
+
+    The body is kept in APRIORI_CACHE_PATH and reused when the server answers 304.
+    """
+    cache_dir = Path(APRIORI_CACHE_PATH)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    key = hashlib.sha1(url.encode()).hexdigest()
+    body_path, meta_path = cache_dir / f"{key}.py", cache_dir / f"{key}.json"
+
+    headers = {}
+    if body_path.exists() and meta_path.exists():
+        meta = json.loads(meta_path.read_text())
+        if meta.get("etag"):
+            headers["If-None-Match"] = meta["etag"]
+        if meta.get("last_modified"):
+            headers["If-Modified-Since"] = meta["last_modified"]
+
+    r = session.get(url, headers=headers, timeout=30)
+    if r.status_code == 304:
+        logger.info(f"Using cached {url}")
+        return body_path.read_text(encoding="utf-8")
+    r.raise_for_status()
+    logger.info(f"Downloaded {url}")
+    body_path.write_text(r.text, encoding="utf-8")
+    meta_path.write_text(json.dumps({
+        "url": url,
+        "etag": r.headers.get("ETag"),
+        "last_modified": r.headers.get("Last-Modified"),
+    }))
+    return r.text
+
+def extract_literals(source, names):
+    """Read top-level `name = <literal>` assignments without executing the source.
+
+    Names that are missing or not plain literals are returned as empty dicts.
+    """
+    values = {name: {} for name in names}
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        for target in targets:
+            if isinstance(target, ast.Name) and target.id in values:
+                try:
+                    values[target.id] = ast.literal_eval(value)
+                except (ValueError, TypeError):
+                    logger.warning(f"'{target.id}' is not a literal, ignoring it.")
+    return values
+
 def get_url(version):
     compare_version = ('0' if len(version) < 4 else '') + version
     if compare_version <= '09.0':
@@ -119,6 +290,8 @@ def make_schema(db):
         )
         """
     )
+    db.execute("CREATE INDEX IF NOT EXISTS renamed_modules_old_name ON renamed_modules (old_name, version)")
+    db.execute("CREATE INDEX IF NOT EXISTS renamed_modules_new_name ON renamed_modules (new_name, version)")
     db.execute(
         """
         CREATE TABLE IF NOT EXISTS merged_modules (
@@ -130,6 +303,8 @@ def make_schema(db):
         )
         """
     )
+    db.execute("CREATE INDEX IF NOT EXISTS merged_modules_from_name ON merged_modules (from_name, version)")
+    db.execute("CREATE INDEX IF NOT EXISTS merged_modules_to_name ON merged_modules (to_name, version)")
 
 def normalize_version(version):
     parts = version.split('.')
@@ -138,8 +313,12 @@ def normalize_version(version):
     else:
         return version
 
-def download(path, url):
-    response = requests.get(url)
+def download(path, url, session=None):
+    if session is None:
+        import requests
+
+        session = requests
+    response = session.get(url)
     response.raise_for_status()
     with open(path, "wb") as f:
-        f.write(response.content)
\ No newline at end of file
+        f.write(response.content)
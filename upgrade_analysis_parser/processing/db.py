@@ -4,13 +4,17 @@
 import sqlite3
 import json
 import contextlib
+import hashlib
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List
+from typing import Dict, List, Optional
 
 from ..models import ChangeRecord
+from .replica import get_replicas
+from ..profiling import TimedCursor
 
 from config import (
-    DB_PATH
+    DB_PATH, SQLITE_MMAP_SIZE, SLOW_QUERY_THRESHOLD
 )
 
 import logging
@@ -18,8 +22,25 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+CHANGE_COLUMNS = (
+    "version", "module", "change_category", "change_type", "model_name", "field_name",
+    "record_model", "xml_id", "description", "raw_line", "details_json",
+)
+
+# details_json attributes exposed as indexed (virtual generated) columns of change_rows and the changes view
+DETAILS_COLUMNS = {
+    "field_type": "$.field_type",
+    "tag": "$.tag",
+}
+
 @contextlib.contextmanager
-def sqlite_db(version: float, clean: bool = False):
+def sqlite_db(version: float, clean: bool = False, readonly: bool = False):
+    """Yield a cursor on the database of `version`.
+
+    Readonly connections are opened with `mode=ro` and memory-map the file
+    (SQLITE_MMAP_SIZE), so server workers share the OS page cache. When
+    in-memory replicas are running (DB_IN_MEMORY), they read from the replica.
+    """
     db_path = Path(DB_PATH) / f"{version}.db"
     if clean and db_path.exists():
         db_path.unlink()
@@ -29,9 +50,18 @@ def sqlite_db(version: float, clean: bool = False):
         logger.error(err_msg)
         raise OSError(err_msg)
 
-    conn = sqlite3.connect(db_path)
+    replicas = get_replicas() if readonly else None
+    replica_uri = replicas.uri_for(str(version)) if replicas else None
+    if replica_uri:
+        conn = sqlite3.connect(replica_uri, uri=True)
+        conn.execute("PRAGMA query_only = ON")
+    elif readonly:
+        conn = sqlite3.connect(f"{db_path.resolve().as_uri()}?mode=ro", uri=True)
+        conn.execute(f"PRAGMA mmap_size = {int(SQLITE_MMAP_SIZE)}")
+    else:
+        conn = sqlite3.connect(db_path)
     conn.row_factory = sqlite3.Row
-    cursor = conn.cursor()
+    cursor = conn.cursor(TimedCursor) if SLOW_QUERY_THRESHOLD > 0 else conn.cursor()
 
     try:
         yield cursor
@@ -43,26 +73,179 @@ def sqlite_db(version: float, clean: bool = False):
     finally:
         conn.close()
 
+def warm_databases() -> None:
+    """Read every database once through a memory-mapped readonly connection.
+
+    Meant to run in the server master process before workers fork, so the pages
+    are already in the OS page cache when the first requests arrive.
+    """
+    for db_file in sorted(Path(DB_PATH).glob("*.db")):
+        with sqlite_db(db_file.stem, readonly=True) as cursor:
+            tables = [row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type='table'")]
+            for table in tables:
+                cursor.execute(f'SELECT * FROM "{table}"').fetchall()
+        logger.info(f"Warmed {db_file.name} ({len(tables)} tables).")
+
 def setup_database(db_path: Path) -> None:
+    """Create the schema of a version database, migrating a flat `changes` table if there is one.
+
+    Repeated values (versions, modules, categories, types, model names) are
+    interned once in `strings`; `change_rows` refers to them by id. The
+    `changes` view joins them back into the original column shape, and its
+    triggers intern values on insert, so readers and writers use `changes`
+    as if it were a table. The view also exposes the DETAILS_COLUMNS
+    attributes of `details_json`, which are indexed generated columns.
+    """
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
-        schema_sql = """
-            CREATE TABLE IF NOT EXISTS changes (
+        legacy = cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'changes'").fetchone()
+        if legacy:
+            cursor.execute("ALTER TABLE changes RENAME TO changes_flat;")
+            for index in ("changes_module", "changes_model_name", "changes_record_model"):
+                cursor.execute(f"DROP INDEX IF EXISTS {index};")
+
+        # Row 0 stands for NULL, so the view can use inner joins only and SQLite may start from any of them
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS strings (
+                id INTEGER PRIMARY KEY,
+                value TEXT UNIQUE
+            );
+        """)
+        cursor.execute("INSERT OR IGNORE INTO strings (id, value) VALUES (0, NULL);")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS change_rows (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                version TEXT NOT NULL,
-                module TEXT NOT NULL,
-                change_category TEXT NOT NULL,
-                change_type TEXT NOT NULL,
-                model_name TEXT,
+                version_id INTEGER NOT NULL REFERENCES strings (id),
+                module_id INTEGER NOT NULL REFERENCES strings (id),
+                change_category_id INTEGER NOT NULL REFERENCES strings (id),
+                change_type_id INTEGER NOT NULL REFERENCES strings (id),
+                model_name_id INTEGER NOT NULL REFERENCES strings (id),
                 field_name TEXT,
-                record_model TEXT,
+                record_model_id INTEGER NOT NULL REFERENCES strings (id),
                 xml_id TEXT,
                 description TEXT,
                 raw_line TEXT,
                 details_json TEXT
             );
-        """
-        cursor.execute(schema_sql)
+        """)
+        existing_columns = {row[1] for row in cursor.execute("PRAGMA table_xinfo(change_rows);")}
+        for column, path in DETAILS_COLUMNS.items():
+            if column not in existing_columns:
+                cursor.execute(
+                    f"ALTER TABLE change_rows ADD COLUMN {column} TEXT"
+                    f" GENERATED ALWAYS AS (json_extract(details_json, '{path}')) VIRTUAL;"
+                )
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS change_rows_{column} ON change_rows ({column});")
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_version ON change_rows (version_id);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_module ON change_rows (module_id);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_model_name ON change_rows (model_name_id);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_record_model ON change_rows (record_model_id);")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS change_rows_category_type ON change_rows (change_category_id, change_type_id);"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_change_type ON change_rows (change_type_id);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_field_name ON change_rows (field_name);")
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_rows_xml_id ON change_rows (xml_id);")
+        # A view from before new details columns is recreated; its triggers are dropped with it
+        view_columns = {row[1] for row in cursor.execute("PRAGMA table_info(changes);")}
+        if view_columns and not view_columns >= set(DETAILS_COLUMNS):
+            cursor.execute("DROP VIEW changes;")
+        cursor.execute(f"""
+            CREATE VIEW IF NOT EXISTS changes AS
+            SELECT
+                r.id,
+                version.value AS version,
+                module.value AS module,
+                change_category.value AS change_category,
+                change_type.value AS change_type,
+                model_name.value AS model_name,
+                r.field_name,
+                record_model.value AS record_model,
+                r.xml_id,
+                r.description,
+                r.raw_line,
+                r.details_json,
+                {', '.join(f'r.{column}' for column in DETAILS_COLUMNS)}
+            FROM change_rows r
+            JOIN strings version ON version.id = r.version_id
+            JOIN strings module ON module.id = r.module_id
+            JOIN strings change_category ON change_category.id = r.change_category_id
+            JOIN strings change_type ON change_type.id = r.change_type_id
+            JOIN strings model_name ON model_name.id = r.model_name_id
+            JOIN strings record_model ON record_model.id = r.record_model_id;
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS changes_insert INSTEAD OF INSERT ON changes
+            BEGIN
+                INSERT OR IGNORE INTO strings (value)
+                SELECT value FROM (
+                    SELECT NEW.version AS value UNION ALL SELECT NEW.module
+                    UNION ALL SELECT NEW.change_category UNION ALL SELECT NEW.change_type
+                    UNION ALL SELECT NEW.model_name UNION ALL SELECT NEW.record_model
+                ) WHERE value IS NOT NULL;
+                INSERT INTO change_rows (
+                    id, version_id, module_id, change_category_id, change_type_id, model_name_id,
+                    field_name, record_model_id, xml_id, description, raw_line, details_json
+                ) VALUES (
+                    NEW.id,
+                    (SELECT id FROM strings WHERE value = NEW.version),
+                    (SELECT id FROM strings WHERE value = NEW.module),
+                    (SELECT id FROM strings WHERE value = NEW.change_category),
+                    (SELECT id FROM strings WHERE value = NEW.change_type),
+                    COALESCE((SELECT id FROM strings WHERE value = NEW.model_name), 0),
+                    NEW.field_name,
+                    COALESCE((SELECT id FROM strings WHERE value = NEW.record_model), 0),
+                    NEW.xml_id,
+                    NEW.description,
+                    NEW.raw_line,
+                    NEW.details_json
+                );
+            END;
+        """)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS changes_delete INSTEAD OF DELETE ON changes
+            BEGIN
+                DELETE FROM change_rows WHERE id = OLD.id;
+            END;
+        """)
+        if legacy:
+            cursor.execute(
+                f"INSERT INTO changes (id, {', '.join(CHANGE_COLUMNS)})"
+                f" SELECT id, {', '.join(CHANGE_COLUMNS)} FROM changes_flat ORDER BY id;"
+            )
+            cursor.execute("DROP TABLE changes_flat;")
+            logger.info(f"Migrated {db_path.name} to interned storage.")
+
+        # One row per parse that changed the data; change_log holds the rows it added and removed
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS builds (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                build TEXT NOT NULL UNIQUE,
+                created_at TEXT NOT NULL,
+                row_count INTEGER NOT NULL,
+                added INTEGER NOT NULL,
+                removed INTEGER NOT NULL
+            );
+        """)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS change_log (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                build_seq INTEGER NOT NULL REFERENCES builds (seq),
+                action TEXT NOT NULL CHECK (action IN ('added', 'removed')),
+                line_hash TEXT NOT NULL,
+                {', '.join(f'{column} TEXT' for column in CHANGE_COLUMNS)}
+            );
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS change_log_build_seq ON change_log (build_seq);")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS migrator_data (
+                object_type TEXT NOT NULL,
+                object TEXT NOT NULL,
+                module TEXT NOT NULL,
+                entries_json TEXT NOT NULL,
+                PRIMARY KEY (object_type, object, module)
+            );
+        """)
         conn.commit()
 
 
@@ -70,8 +253,9 @@ def clear_all_changes(db_path: Path) -> None:
     with sqlite3.connect(db_path) as conn:
         cursor = conn.cursor()
         logger.info(f"Clearing old data from {db_path.name}...")
-        cursor.execute("DELETE FROM changes;")
-        cursor.execute("DELETE FROM sqlite_sequence WHERE name='changes';")
+        cursor.execute("DELETE FROM change_rows;")
+        cursor.execute("DELETE FROM strings WHERE id != 0;")
+        cursor.execute("DELETE FROM sqlite_sequence WHERE name='change_rows';")
         conn.commit()
         logger.info("Old data cleared.")
 
@@ -127,6 +311,59 @@ def insert_data(db_path: Path, data: List[ChangeRecord]) -> None:
             f"Successfully inserted {len(rows_to_insert)} new records into {db_path.name}."
         )
 
+def line_hash(raw_line: Optional[str]) -> str:
+    return hashlib.sha1((raw_line or "").encode("utf-8")).hexdigest()
+
+
+def load_changes_by_hash(db_path: Path) -> Dict[str, tuple]:
+    """Current rows of `changes` (CHANGE_COLUMNS), keyed by the hash of their raw_line."""
+    with sqlite3.connect(db_path) as conn:
+        rows = conn.execute(f"SELECT {', '.join(CHANGE_COLUMNS)} FROM changes").fetchall()
+    raw_line_index = CHANGE_COLUMNS.index("raw_line")
+    return {line_hash(row[raw_line_index]): row for row in rows}
+
+
+def record_build(db_path: Path, previous: Dict[str, tuple]) -> Optional[str]:
+    """Record a new build with the rows added and removed since `previous`.
+
+    The first build of a database is a baseline and logs no rows: clients start
+    from a full download and then follow the change log. Returns the build id,
+    or None when the data did not change since the last build.
+    """
+    current = load_changes_by_hash(db_path)
+    added = sorted(current.keys() - previous.keys())
+    removed = sorted(previous.keys() - current.keys())
+
+    with sqlite3.connect(db_path) as conn:
+        last = conn.execute("SELECT build FROM builds ORDER BY seq DESC LIMIT 1").fetchone()
+        if last and not added and not removed:
+            logger.info(f"No changes since build {last[0]} in {db_path.name}.")
+            return None
+
+        # Chained on the previous build, so returning to older data still gets a new id
+        digest = hashlib.sha256((last[0] if last else "").encode("utf-8"))
+        for key in sorted(current):
+            digest.update(key.encode("utf-8"))
+        build = digest.hexdigest()[:16]
+        created_at = datetime.now(timezone.utc).isoformat()
+        if not last:
+            added, removed = [], []
+        seq = conn.execute(
+            "INSERT INTO builds (build, created_at, row_count, added, removed) VALUES (?, ?, ?, ?, ?)",
+            (build, created_at, len(current), len(added), len(removed)),
+        ).lastrowid
+        log_rows = [(seq, "removed", key, *previous[key]) for key in removed]
+        log_rows += [(seq, "added", key, *current[key]) for key in added]
+        conn.executemany(
+            f"INSERT INTO change_log (build_seq, action, line_hash, {', '.join(CHANGE_COLUMNS)})"
+            f" VALUES ({', '.join('?' * (len(CHANGE_COLUMNS) + 3))})",
+            log_rows,
+        )
+        conn.commit()
+    logger.info(f"Recorded build {build} of {db_path.name}: {len(added)} added, {len(removed)} removed.")
+    return build
+
+
 def db_path_for_version(major_version: float) -> Path:
     return Path(DB_PATH) / f"{major_version}.db"
 
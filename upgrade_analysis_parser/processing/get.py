@@ -16,58 +16,165 @@ from collections import defaultdict
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# (object_type, object) pairs exposed to odoo-module-migrator
+MIGRATOR_DATASETS = [
+    ("removed", "models"),
+    ("removed", "fields"),
+    ("renamed", "models"),
+    ("renamed", "fields"),
+]
 
-def generate_removed_models(major_version: float, out_dir: Path) -> None:
+
+def collect_removed_models(cur: sqlite3.Cursor) -> list[list]:
+    """Return removed models as ['model', ''] entries."""
+    cur.execute(
+        """
+        SELECT DISTINCT model_name
+        FROM changes
+        WHERE change_category='MODEL' AND change_type='OBSOLETE' AND model_name IS NOT NULL
+        ORDER BY model_name
+        """
+    )
+    return [[row[0], ""] for row in cur.fetchall()]
+
+
+def collect_removed_fields(cur: sqlite3.Cursor) -> dict[str, list[list]]:
+    """Return removed fields as ['model', 'field', ''] entries grouped by module."""
+    by_module = defaultdict(list)
+    cur.execute(
+        """
+        SELECT module, model_name, field_name
+        FROM changes
+        WHERE change_category='FIELD' AND change_type='DEL'
+              AND model_name IS NOT NULL AND field_name IS NOT NULL
+        ORDER BY module, model_name, field_name
+        """
+    )
+    for module, model, field in cur.fetchall():
+        by_module[module].append([model, field, ""])
+    return dict(by_module)
+
+
+def collect_renamed_models(cur: sqlite3.Cursor) -> list[list]:
+    """Return renamed models as ['old.model', 'new.model', None] entries.
+
+    Both directions of the parser output ("renamed to" / "renamed from") are combined.
+    """
+    renamed_model_pairs = set()
+    cur.execute(
+        """
+        SELECT model_name, details_json
+        FROM changes
+        WHERE change_category='MODEL' AND details_json IS NOT NULL AND model_name IS NOT NULL
+        ORDER BY model_name
+        """
+    )
+    for model_name, details_json in cur.fetchall():
+        try:
+            details = json.loads(details_json) if details_json else {}
+        except json.JSONDecodeError:
+            details = {}
+        info = details.get("rename_info") if isinstance(details, dict) else None
+        if not info:
+            continue
+        m_to = re.search(r"\brenamed\s+to\s+([\w\.]+)", info)
+        m_from = re.search(r"\brenamed\s+from\s+([\w\.]+)", info)
+        if m_to:
+            renamed_model_pairs.add((model_name, m_to.group(1)))
+        elif m_from:
+            renamed_model_pairs.add((m_from.group(1), model_name))
+    return [[old, new, None] for old, new in sorted(renamed_model_pairs)]
+
+
+def collect_renamed_fields(scripts_path: Path) -> dict[str, list[list]]:
+    """Return renamed fields as ['model', 'old_field', 'new_field', ''] entries grouped by module.
+
+    Data comes from the rename_fields calls of the synced pre-migration.py files.
+    """
+    renamed_fields_by_module: dict[str, list[tuple[str, str, str]]] = defaultdict(list)
+    for pre_path in scripts_path.glob("**/*/pre-migration.py"):
+        # .../<module>/<version>/pre-migration.py
+        if pre_path.parent is None or pre_path.parent.parent is None:
+            continue
+        module_name = pre_path.parent.parent.name
+        tuples = parse_pre_migration_for_renamed_fields(pre_path)
+        if tuples:
+            renamed_fields_by_module[module_name].extend(tuples)
+    # Ensure deterministic ordering within each module
+    return {
+        module: [[model, old_field, new_field, ""] for model, old_field, new_field in sorted(entries)]
+        for module, entries in sorted(renamed_fields_by_module.items())
+    }
+
+
+def format_yaml_entries(object_type: str, object: str, entries: list[list]) -> str:
+    """Render entries in the YAML flavour expected by odoo-module-migrator."""
+    if object_type == "renamed" and object == "models":
+        return "".join(f"- [\"{old}\", \"{new}\", None]\n" for old, new, _ in entries)
+    return "".join("- [" + ", ".join(f"'{value}'" for value in entry) + "]\n" for entry in entries)
+
+
+def store_migrator_data(major_version: float, scripts_path: Path) -> None:
+    """Precompute every odoo-module-migrator dataset into the version database.
+
+    Rows are stored per (object_type, object, module); models datasets use an empty module.
+    """
     db_path = db_path_for_version(major_version)
     if not ensure_db_exists(db_path, major_version):
         return
-    models = []
     with sqlite3.connect(db_path) as conn:
         cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT DISTINCT model_name
-            FROM changes
-            WHERE change_category='MODEL' AND change_type='OBSOLETE' AND model_name IS NOT NULL
-            ORDER BY model_name
-            """
+        datasets = {
+            ("removed", "models"): {"": collect_removed_models(cur)},
+            ("removed", "fields"): collect_removed_fields(cur),
+            ("renamed", "models"): {"": collect_renamed_models(cur)},
+            ("renamed", "fields"): collect_renamed_fields(scripts_path),
+        }
+        cur.execute("DELETE FROM migrator_data;")
+        cur.executemany(
+            "INSERT INTO migrator_data (object_type, object, module, entries_json) VALUES (?, ?, ?, ?);",
+            [
+                (object_type, object, module, json.dumps(entries))
+                for (object_type, object), by_module in datasets.items()
+                for module, entries in by_module.items()
+            ],
         )
-        models = [row[0] for row in cur.fetchall()]
+        conn.commit()
+    logger.info(f"Stored odoo-module-migrator data for version {major_version} in {db_path.name}.")
+
+
+def fetch_migrator_data(
+    cur: sqlite3.Cursor, object_type: str, object: str, module: str | None = None
+) -> dict[str, list[list]]:
+    """Read precomputed entries grouped by module, optionally restricted to one module."""
+    query = "SELECT module, entries_json FROM migrator_data WHERE object_type = ? AND object = ?"
+    params = [object_type, object]
+    if module:
+        query += " AND module = ?"
+        params.append(module)
+    cur.execute(query + " ORDER BY module", tuple(params))
+    return {row[0]: json.loads(row[1]) for row in cur.fetchall()}
+
+
+def generate_removed_models(major_version: float, out_dir: Path) -> None:
+    db_path = db_path_for_version(major_version)
+    if not ensure_db_exists(db_path, major_version):
+        return
+    with sqlite3.connect(db_path) as conn:
+        entries = collect_removed_models(conn.cursor())
     target_file = out_dir / "removed_models.yaml"
     with open(target_file, "w", encoding="utf-8") as f:
-        for m in models:
-            f.write(f"- ['{m}', '']\n")
-    logger.info(f"Wrote {len(models)} removed models to {target_file}")
+        f.write(format_yaml_entries("removed", "models", entries))
+    logger.info(f"Wrote {len(entries)} removed models to {target_file}")
 
 
 def generate_removed_fields(major_version: float, out_dir: Path) -> None:
     db_path = db_path_for_version(major_version)
     if not ensure_db_exists(db_path, major_version):
         return
-    by_module = defaultdict(list)
     with sqlite3.connect(db_path) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT module, model_name, field_name
-            FROM changes
-            WHERE change_category='FIELD' AND change_type='DEL'
-                  AND model_name IS NOT NULL AND field_name IS NOT NULL
-            ORDER BY module, model_name, field_name
-            """
-        )
-        for module, model, field in cur.fetchall():
-            by_module[module].append((model, field))
-    count_files = 0
-    total_entries = 0
-    for module, items in by_module.items():
-        target_file = out_dir / f"{module}.yaml"
-        with open(target_file, "w", encoding="utf-8") as f:
-            for model, field in items:
-                f.write(f"- ['{model}', '{field}', '']\n")
-        count_files += 1
-        total_entries += len(items)
-    logger.info(f"Wrote {total_entries} removed fields across {count_files} module files in {out_dir}")
+        by_module = collect_removed_fields(conn.cursor())
+    _write_module_files("removed", "fields", by_module, out_dir)
 
 
 def generate_renamed_models(major_version: float, out_dir: Path) -> None:
@@ -79,41 +186,13 @@ def generate_renamed_models(major_version: float, out_dir: Path) -> None:
     db_path = db_path_for_version(major_version)
     if not ensure_db_exists(db_path, major_version):
         return
-    renamed_model_pairs = set()
     with sqlite3.connect(db_path) as conn:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT model_name, details_json
-            FROM changes
-            WHERE change_category='MODEL' AND details_json IS NOT NULL AND model_name IS NOT NULL
-            ORDER BY model_name
-            """
-        )
-        rows = cur.fetchall()
-    for model_name, details_json in rows:
-        try:
-            details = json.loads(details_json) if details_json else {}
-        except json.JSONDecodeError:
-            details = {}
-        info = details.get("rename_info") if isinstance(details, dict) else None
-        if not info:
-            continue
-        m_to = re.search(r"\brenamed\s+to\s+([\w\.]+)", info)
-        m_from = re.search(r"\brenamed\s+from\s+([\w\.]+)", info)
-        if m_to:
-            old_model = model_name
-            new_model = m_to.group(1)
-            renamed_model_pairs.add((old_model, new_model))
-        elif m_from:
-            old_model = m_from.group(1)
-            new_model = model_name
-            renamed_model_pairs.add((old_model, new_model))
+        entries = collect_renamed_models(conn.cursor())
     target_file = out_dir / "renamed_models.yaml"
     with open(target_file, "w", encoding="utf-8") as f:
-        for old, new in sorted(renamed_model_pairs):
-            f.write(f"- [\"{old}\", \"{new}\", None]\n")
-    logger.info(f"Wrote {len(renamed_model_pairs)} renamed models to {target_file}")
+        f.write(format_yaml_entries("renamed", "models", entries))
+    logger.info(f"Wrote {len(entries)} renamed models to {target_file}")
+
 
 def generate_renamed_fields(major_version: float, out_dir: Path) -> None:
     """Generate renamed fields YAML by parsing pre-migration.py rename_fields calls.
@@ -126,24 +205,16 @@ def generate_renamed_fields(major_version: float, out_dir: Path) -> None:
         logger.error(f"Source directory not found for version {major_version} at {base}.")
         logger.error(f"Please run 'python manage.py sync --versions {major_version}' first.")
         return
-    renamed_fields_by_module: dict[str, list[tuple[str, str, str]]] = defaultdict(list)
-    for pre_path in base.glob("**/*/pre-migration.py"):
-        # .../<module>/<version>/pre-migration.py
-        if pre_path.parent is None or pre_path.parent.parent is None:
-            continue
-        module_name = pre_path.parent.parent.name
-        tuples = parse_pre_migration_for_renamed_fields(pre_path)
-        if tuples:
-            renamed_fields_by_module[module_name].extend(tuples)
+    _write_module_files("renamed", "fields", collect_renamed_fields(base), out_dir)
+
+
+def _write_module_files(object_type: str, object: str, by_module: dict[str, list[list]], out_dir: Path) -> None:
     count_files = 0
     total_entries = 0
-    for module, entries in sorted(renamed_fields_by_module.items()):
-        # Ensure deterministic ordering within each file
-        entries_sorted = sorted(entries)
+    for module, entries in by_module.items():
         target_file = out_dir / f"{module}.yaml"
         with open(target_file, "w", encoding="utf-8") as f:
-            for model, old_field, new_field in entries_sorted:
-                f.write(f"- ['{model}', '{old_field}', '{new_field}', '']\n")
+            f.write(format_yaml_entries(object_type, object, entries))
         count_files += 1
-        total_entries += len(entries_sorted)
-    logger.info(f"Wrote {total_entries} renamed fields across {count_files} module files in {out_dir}")
+        total_entries += len(entries)
+    logger.info(f"Wrote {total_entries} {object_type} {object} across {count_files} module files in {out_dir}")
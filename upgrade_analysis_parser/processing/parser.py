@@ -6,7 +6,10 @@ from pathlib import Path
 from typing import List, Optional
 
 from ..models import ChangeRecord
-from .db import setup_database, clear_all_changes, insert_data, db_path_for_version, ensure_db_exists
+from .db import (
+    setup_database, clear_all_changes, insert_data, db_path_for_version, ensure_db_exists, load_changes_by_hash,
+    record_build,
+)
 
 import logging
 
@@ -128,20 +131,22 @@ class UpgradeAnalysisParser:
 def run_parse_for_version(major_version: int, base_scripts_dir: Path):
     db_path = db_path_for_version(major_version)
     setup_database(db_path)
+    previous = load_changes_by_hash(db_path)
     clear_all_changes(db_path)
 
     glob_pattern = f"**/{major_version}.*/**/*upgrade_analysis.txt"
     analysis_files = list(base_scripts_dir.glob(glob_pattern))
 
-    if not analysis_files:
+    if analysis_files:
+        logger.info(f"Found {len(analysis_files)} analysis files for version {major_version}.*.")
+        all_changes = [change for file_path in analysis_files for change in UpgradeAnalysisParser(str(file_path)).parse()]
+
+        if all_changes:
+            insert_data(db_path, all_changes)
+    else:
         logger.warning(f"No analysis files found for version {major_version}.*")
-        return
 
-    logger.info(f"Found {len(analysis_files)} analysis files for version {major_version}.*.")
-    all_changes = [change for file_path in analysis_files for change in UpgradeAnalysisParser(str(file_path)).parse()]
-    
-    if all_changes:
-        insert_data(db_path, all_changes)
+    record_build(db_path, previous)
 
 def parse_pre_migration_for_renamed_fields(py_path: Path) -> list[tuple[str, str, str]]:
     """Parse a pre-migration.py file to collect rename_fields tuples.
@@ -0,0 +1,185 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import itertools
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from config import DB_PATH, DB_RELOAD_INTERVAL
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+_generation = itertools.count(1)
+
+
+@dataclass
+class Replica:
+    """A shared-cache in-memory copy of one database file."""
+    name: str
+    uri: str
+    stamp: Tuple[int, int]
+    memory_bytes: int
+    file_bytes: int
+    loaded_at: float
+    anchor: sqlite3.Connection  # keeps the in-memory database alive
+
+
+def _stamp(path: Path) -> Tuple[int, int]:
+    stat = path.stat()
+    return stat.st_mtime_ns, stat.st_size
+
+
+def _load_replica(path: Path) -> Replica:
+    stamp = _stamp(path)
+    uri = f"file:replica-{os.getpid()}-{path.stem}-{next(_generation)}?mode=memory&cache=shared"
+    anchor = sqlite3.connect(uri, uri=True, check_same_thread=False)
+    source = sqlite3.connect(f"{path.resolve().as_uri()}?mode=ro", uri=True)
+    try:
+        source.backup(anchor)
+    finally:
+        source.close()
+    page_count = anchor.execute("PRAGMA page_count").fetchone()[0]
+    page_size = anchor.execute("PRAGMA page_size").fetchone()[0]
+    return Replica(
+        name=path.stem,
+        uri=uri,
+        stamp=stamp,
+        memory_bytes=page_count * page_size,
+        file_bytes=stamp[1],
+        loaded_at=time.time(),
+        anchor=anchor,
+    )
+
+
+class ReplicaManager:
+    """Serve reads from in-memory copies of every database in DB_PATH.
+
+    A watcher thread polls the files and swaps in a fresh copy once a changed
+    file has kept the same stamp for one full interval, so a database that is
+    still being rebuilt by `manage.py parse` is not picked up half-written.
+    A replaced copy is kept alive until the next swap, so requests that just
+    looked up its URI can still connect to it.
+    """
+
+    def __init__(self, db_path: str = DB_PATH, interval: float = DB_RELOAD_INTERVAL):
+        self.db_path = Path(db_path)
+        self.interval = interval
+        self.pid = os.getpid()
+        self._replicas: Dict[str, Replica] = {}
+        self._retired: Dict[str, Replica] = {}
+        self._pending: Dict[str, Tuple[int, int]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        for path in sorted(self.db_path.glob("*.db")):
+            self._reload(path)
+        self._thread = threading.Thread(target=self._watch, name="db-replica-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def uri_for(self, name: str) -> Optional[str]:
+        replica = self._replicas.get(name)
+        return replica.uri if replica else None
+
+    def stamp_for(self, name: str) -> Optional[Tuple[int, int]]:
+        """Return the file stamp the current replica of `name` was loaded from."""
+        replica = self._replicas.get(name)
+        return replica.stamp if replica else None
+
+    def report(self) -> Dict[str, dict]:
+        return {
+            name: {
+                "memory_bytes": replica.memory_bytes,
+                "file_bytes": replica.file_bytes,
+                "loaded_at": replica.loaded_at,
+            }
+            for name, replica in sorted(self._replicas.items())
+        }
+
+    def _reload(self, path: Path) -> None:
+        try:
+            replica = _load_replica(path)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Could not load in-memory replica of {path.name}: {e}")
+            return
+        # Swapping the dict entry is atomic; new requests see the new copy right away
+        old = self._replicas.get(replica.name)
+        self._replicas[replica.name] = replica
+        self._retire(replica.name, old)
+        logger.info(
+            f"Loaded in-memory replica of {path.name}: "
+            f"{replica.memory_bytes / 1024 / 1024:.1f} MiB (file {replica.file_bytes / 1024 / 1024:.1f} MiB)."
+        )
+
+    def _retire(self, name: str, replica: Optional[Replica]) -> None:
+        previous = self._retired.pop(name, None)
+        if previous:
+            previous.anchor.close()
+        if replica:
+            self._retired[name] = replica
+
+    def _poll(self) -> None:
+        paths = {path.stem: path for path in self.db_path.glob("*.db")}
+        for name in set(self._replicas) - set(paths):
+            logger.info(f"Dropping in-memory replica of {name}.db, the file was removed.")
+            self._retire(name, self._replicas.pop(name))
+        for name, path in paths.items():
+            try:
+                stamp = _stamp(path)
+            except OSError:
+                continue
+            replica = self._replicas.get(name)
+            if replica and replica.stamp == stamp:
+                self._pending.pop(name, None)
+            elif self._pending.get(name) == stamp:
+                del self._pending[name]
+                self._reload(path)
+            else:
+                self._pending[name] = stamp
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.interval):
+            self._poll()
+
+
+_manager: Optional[ReplicaManager] = None
+
+
+def start_replicas() -> ReplicaManager:
+    """Start serving reads from in-memory replicas in the current process.
+
+    Call it after forking: SQLite connections must not be shared across processes.
+    """
+    global _manager
+    _manager = ReplicaManager()
+    _manager.start()
+    return _manager
+
+
+def get_replicas() -> Optional[ReplicaManager]:
+    """Return the replica manager of the current process, if replicas are enabled."""
+    if _manager is not None and _manager.pid == os.getpid():
+        return _manager
+    return None
+
+
+def data_stamp(path: Path) -> Tuple[int, int]:
+    """Return the stamp of the data that reads of `path` are served from.
+
+    While a replica is loaded, that is the stamp of the file it was copied from:
+    a rebuilt file is only served once the watcher has swapped its replica.
+    """
+    replicas = get_replicas()
+    stamp = replicas.stamp_for(path.stem) if replicas else None
+    return stamp if stamp is not None else _stamp(path)
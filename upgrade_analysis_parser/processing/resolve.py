@@ -0,0 +1,284 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import glob
+import json
+import os
+import re
+import sqlite3
+from collections import defaultdict
+from contextlib import closing
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from .db import sqlite_db
+from .get import collect_renamed_models, fetch_migrator_data
+from config import DB_PATH
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RESOLVE_KINDS = ("model", "field", "xml_id", "module")
+
+RE_XML_RENAME = re.compile(r"renamed\s+(from|to)\s+([\w\.]+)(\s+module)?")
+
+# When several events happen along a path, the strongest one gives the overall status
+STATUS_PRIORITY = {"renamed": 1, "merged": 2, "deleted": 3}
+
+
+@dataclass
+class Hop:
+    """Renames and deletions that happen when migrating to `version`."""
+    version: str
+    renamed: Dict[str, Dict[str, str]] = field(default_factory=lambda: defaultdict(dict))
+    merged: Dict[str, Dict[str, str]] = field(default_factory=lambda: defaultdict(dict))
+    deleted: Dict[str, Set[str]] = field(default_factory=lambda: defaultdict(set))
+    known_fields: Set[str] = field(default_factory=set)
+
+    def step(self, kind: str, name: str) -> Tuple[Optional[str], Optional[str]]:
+        """Return (status, new_name) for `name` across this hop; status is None when unchanged."""
+        if kind == "field":
+            model, _, field_name = name.rpartition(".")
+            new_model = self.renamed["model"].get(model, model)
+            renamed_field = (
+                self.renamed["field"].get(f"{model}.{field_name}")
+                or self.renamed["field"].get(f"{new_model}.{field_name}")
+            )
+            if renamed_field:
+                return "renamed", f"{new_model}.{renamed_field.rpartition('.')[2]}"
+            if name in self.deleted["field"] or model in self.deleted["model"]:
+                return "deleted", None
+            if new_model != model:
+                return "renamed", f"{new_model}.{field_name}"
+            return None, name
+        if name in self.renamed[kind]:
+            return "renamed", self.renamed[kind][name]
+        if name in self.merged[kind]:
+            return "merged", self.merged[kind][name]
+        if name in self.deleted[kind]:
+            return "deleted", None
+        return None, name
+
+    def sources(self, kind: str) -> Set[str]:
+        names = set(self.renamed[kind]) | set(self.merged[kind]) | self.deleted[kind]
+        if kind == "field":
+            # Fields follow their model when it is renamed or deleted
+            models = set(self.renamed["model"]) | self.deleted["model"]
+            names |= {name for name in self.known_fields if name.rpartition(".")[0] in models}
+        return names
+
+
+def _field_sources(hops: List[Hop]) -> List[Set[str]]:
+    """Return, for each start hop, the field names to resolve from there.
+
+    OpenUpgrade lists the fields of a renamed model under its new name only, so
+    when a hop renames `old` to `new`, `old.<f>` is added for every `new.<f>` a
+    later hop renames, deletes or knows, and the closure follows the whole chain.
+    """
+    sources: List[Set[str]] = [set() for _ in hops]
+    names: Set[str] = set()
+    later_fields: Dict[str, Set[str]] = defaultdict(set)  # model -> fields seen in later hops
+    for index in range(len(hops) - 1, -1, -1):
+        hop = hops[index]
+        hop_names = hop.sources("field")
+        for old_model, new_model in hop.renamed["model"].items():
+            hop_names |= {f"{old_model}.{field_name}" for field_name in later_fields.get(new_model, ())}
+        for name in hop_names | hop.known_fields:
+            model, _, field_name = name.rpartition(".")
+            later_fields[model].add(field_name)
+        names = sources[index] = names | hop_names
+    return sources
+
+
+def _version_key(version: str) -> float:
+    return float(version)
+
+
+def _load_version_hop(version: str, db_path: Path) -> Hop:
+    hop = Hop(version=version)
+    with sqlite3.connect(db_path) as conn:
+        cur = conn.cursor()
+        for old, new, _ in collect_renamed_models(cur):
+            hop.renamed["model"][old] = new
+        try:
+            renamed_fields = fetch_migrator_data(cur, "renamed", "fields")
+        except sqlite3.OperationalError:
+            renamed_fields = {}
+        for entries in renamed_fields.values():
+            for model, old_field, new_field, _ in entries:
+                hop.renamed["field"][f"{model}.{old_field}"] = f"{model}.{new_field}"
+
+        cur.execute(
+            "SELECT model_name FROM changes WHERE change_category='MODEL' AND change_type='OBSOLETE'"
+        )
+        hop.deleted["model"] = {row[0] for row in cur.fetchall()} - set(hop.renamed["model"])
+
+        cur.execute(
+            "SELECT model_name, field_name, change_type FROM changes"
+            " WHERE change_category='FIELD' AND model_name IS NOT NULL AND field_name IS NOT NULL"
+        )
+        for model, field_name, change_type in cur.fetchall():
+            name = f"{model}.{field_name}"
+            hop.known_fields.add(name)
+            if change_type == "DEL":
+                hop.deleted["field"].add(name)
+        hop.deleted["field"] -= set(hop.renamed["field"])
+
+        cur.execute(
+            "SELECT xml_id, change_type, details_json FROM changes"
+            " WHERE change_category='XML_RECORD' AND xml_id IS NOT NULL"
+        )
+        deleted_xml_ids = set()
+        for xml_id, change_type, details_json in cur.fetchall():
+            if change_type == "DEL":
+                deleted_xml_ids.add(xml_id)
+                continue
+            if change_type != "RENAMED":
+                continue
+            info = json.loads(details_json or "{}").get("rename_info", "")
+            match = RE_XML_RENAME.search(info)
+            if not match:
+                continue
+            direction, other, is_module = match.groups()
+            if is_module or "." not in other:
+                other = f"{other}.{xml_id.partition('.')[2]}"
+            if direction == "from":
+                hop.renamed["xml_id"][other] = xml_id
+            else:
+                hop.renamed["xml_id"][xml_id] = other
+        hop.deleted["xml_id"] = deleted_xml_ids - set(hop.renamed["xml_id"])
+    return hop
+
+
+def _load_hops() -> List[Hop]:
+    hops: Dict[str, Hop] = {}
+    for db_file in glob.glob(f"{DB_PATH}/*.db"):
+        match = re.search(r"(\d*\.\d+)\.db$", db_file)
+        if match:
+            hops[match.group(1)] = _load_version_hop(match.group(1), Path(db_file))
+
+    if (Path(DB_PATH) / "apriori.db").exists():
+        with sqlite_db("apriori", readonly=True) as cursor:
+            for version, old_name, new_name in cursor.execute(
+                "SELECT version, old_name, new_name FROM renamed_modules"
+            ).fetchall():
+                hops.setdefault(version, Hop(version=version)).renamed["module"][old_name] = new_name
+            for version, from_name, to_name in cursor.execute(
+                "SELECT version, from_name, to_name FROM merged_modules"
+            ).fetchall():
+                hops.setdefault(version, Hop(version=version)).merged["module"][from_name] = to_name
+
+    return sorted(hops.values(), key=lambda hop: _version_key(hop.version))
+
+
+def build_resolve_graph() -> None:
+    """Precompute the transitive closure of renames/deletions for every version pair.
+
+    Only names affected between two versions are stored; a missing row means the
+    name is unchanged, so resolving a name is a single lookup on the primary key.
+    """
+    hops = _load_hops()
+    if not hops:
+        logger.warning("No version data found, skipping rename graph.")
+        return
+
+    rows = []
+    field_sources = _field_sources(hops)
+    for start, first_hop in enumerate(hops):
+        from_version = _version_key(first_hop.version) - 1
+        for kind in RESOLVE_KINDS:
+            if kind == "field":
+                names = field_sources[start]
+            else:
+                names = set().union(*(hop.sources(kind) for hop in hops[start:]))
+            for name in names:
+                current, status, path = name, None, [[str(from_version), name]]
+                for hop in hops[start:]:
+                    if current is not None:
+                        hop_status, current = hop.step(kind, current)
+                        if hop_status:
+                            path.append([hop.version, current])
+                            if not status or STATUS_PRIORITY[hop_status] > STATUS_PRIORITY[status]:
+                                status = hop_status
+                    if status:
+                        rows.append((
+                            kind, name, from_version, _version_key(hop.version),
+                            current, status, json.dumps(path),
+                        ))
+
+    # Build next to resolve.db and swap it in, so /resolve keeps serving the old graph meanwhile
+    db_path = Path(DB_PATH) / "resolve.db"
+    tmp_path = db_path.with_name(db_path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    with closing(sqlite3.connect(tmp_path)) as conn, conn:
+        conn.execute(
+            """
+            CREATE TABLE resolved_names (
+                kind TEXT NOT NULL,
+                name TEXT NOT NULL,
+                from_version REAL NOT NULL,
+                to_version REAL NOT NULL,
+                resolved_name TEXT,
+                status TEXT NOT NULL,
+                path_json TEXT NOT NULL,
+                PRIMARY KEY (kind, name, from_version, to_version)
+            ) WITHOUT ROWID
+            """
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO resolved_names VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+        )
+    os.replace(tmp_path, db_path)
+    logger.info(f"Stored {len(rows)} resolved names across {len(hops)} versions.")
+
+
+def _lookup(cursor, kind: str, name: str, from_version: float, to_version: float):
+    return cursor.execute(
+        "SELECT resolved_name, status, path_json FROM resolved_names"
+        " WHERE kind = ? AND name = ? AND from_version >= ? AND to_version <= ?"
+        " ORDER BY from_version ASC, to_version DESC LIMIT 1",
+        (kind, name, from_version, to_version),
+    ).fetchone()
+
+
+def resolve_name(kind: str, name: str, from_version: float, to_version: float) -> dict:
+    """Resolve what `name` (as of `from_version`) is called in `to_version`.
+
+    Fields are given as `model.field`. The closest stored pair inside the requested
+    range wins, so versions without any data in between are skipped over.
+    """
+    result = {
+        "kind": kind,
+        "name": name,
+        "from": str(from_version),
+        "to": str(to_version),
+        "resolved_name": name,
+        "status": "unchanged",
+        "path": [],
+    }
+    with sqlite_db("resolve", readonly=True) as cursor:
+        row = _lookup(cursor, kind, name, from_version, to_version)
+        if row:
+            result.update(
+                resolved_name=row["resolved_name"],
+                status=row["status"],
+                path=json.loads(row["path_json"]),
+            )
+        elif kind == "field":
+            # Fields never listed in the analysis still follow their model
+            model, _, field_name = name.rpartition(".")
+            row = _lookup(cursor, "model", model, from_version, to_version)
+            if row:
+                suffix = f".{field_name}"
+                result.update(
+                    resolved_name=row["resolved_name"] and row["resolved_name"] + suffix,
+                    status=row["status"],
+                    path=[
+                        [version, step and step + suffix]
+                        for version, step in json.loads(row["path_json"])
+                    ],
+                )
+    return result
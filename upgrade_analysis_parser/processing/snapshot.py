@@ -0,0 +1,101 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict
+
+from ..models import ChangeRecord
+from .db import db_path_for_version, ensure_db_exists
+from config import DB_PATH
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Bump when the layout of the snapshot files changes
+SNAPSHOT_FORMAT_VERSION = 1
+
+SNAPSHOT_FORMATS = {
+    "ndjson": ("changes.ndjson.gz", "application/gzip"),
+    "csv": ("changes.csv.gz", "application/gzip"),
+}
+
+
+def snapshot_path(major_version: float, fmt: str) -> Path:
+    return Path(DB_PATH) / f"{major_version}.{SNAPSHOT_FORMATS[fmt][0]}"
+
+
+def manifest_path(major_version: float) -> Path:
+    return Path(DB_PATH) / f"{major_version}.snapshot.json"
+
+
+def read_manifest(major_version: float) -> Dict:
+    return json.loads(manifest_path(major_version).read_text(encoding="utf-8"))
+
+
+def _replace_atomically(path: Path, data: bytes) -> None:
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    os.replace(tmp_path, path)
+
+
+def write_snapshot(major_version: float) -> None:
+    """Export the changes of a version as gzip NDJSON and gzip CSV, next to its database.
+
+    A manifest records the build id (hash of the NDJSON export), row count and
+    per-file checksums; files are swapped in atomically so readers never see
+    a partial export.
+    """
+    db_path = db_path_for_version(major_version)
+    if not ensure_db_exists(db_path, major_version):
+        return
+    columns = list(ChangeRecord.model_fields)
+
+    ndjson_buffer, csv_buffer = io.BytesIO(), io.BytesIO()
+    rows = 0
+    # mtime=0 keeps the archives byte-identical for identical data
+    with sqlite3.connect(db_path) as conn, \
+            gzip.GzipFile(fileobj=ndjson_buffer, mode="wb", mtime=0) as ndjson_file, \
+            gzip.GzipFile(fileobj=csv_buffer, mode="wb", mtime=0) as csv_gzip:
+        csv_file = io.TextIOWrapper(csv_gzip, encoding="utf-8", newline="")
+        writer = csv.writer(csv_file)
+        writer.writerow(columns)
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM changes ORDER BY id")
+        for row in cursor:
+            record = dict(zip(columns, row))
+            record["details_json"] = json.loads(record["details_json"]) if record["details_json"] else {}
+            ndjson_file.write(json.dumps(record).encode("utf-8") + b"\n")
+            writer.writerow(row)
+            rows += 1
+        csv_file.flush()
+        csv_file.detach()
+
+        # Same id as /changes/since, so clients can follow the change log from this snapshot
+        last_build = conn.execute("SELECT build FROM builds ORDER BY seq DESC LIMIT 1").fetchone()
+
+    files = {"ndjson": ndjson_buffer.getvalue(), "csv": csv_buffer.getvalue()}
+    manifest = {
+        "format_version": SNAPSHOT_FORMAT_VERSION,
+        "major_version": str(major_version),
+        "build": last_build[0] if last_build else hashlib.sha256(files["ndjson"]).hexdigest()[:16],
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "rows": rows,
+        "files": {
+            fmt: {"name": snapshot_path(major_version, fmt).name, "size": len(data),
+                  "sha256": hashlib.sha256(data).hexdigest()}
+            for fmt, data in files.items()
+        },
+    }
+    for fmt, data in files.items():
+        _replace_atomically(snapshot_path(major_version, fmt), data)
+    _replace_atomically(manifest_path(major_version), json.dumps(manifest, indent=2).encode("utf-8"))
+    logger.info(f"Wrote snapshot {manifest['build']} of {rows} changes for version {major_version}.")
@@ -0,0 +1,96 @@
+# Copyright 2025 Trobz
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl)
+
+import cProfile
+import json
+import re
+import sqlite3
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from config import LOG_PATH, SLOW_QUERY_THRESHOLD, PROFILE_PATH
+
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("upgrade_analysis_parser.slow_query")
+
+
+def setup_slow_query_log() -> None:
+    """Also write slow queries, one JSON object per line, to LOG_PATH/slow_queries.log."""
+    if SLOW_QUERY_THRESHOLD <= 0 or any(isinstance(h, logging.FileHandler) for h in slow_query_logger.handlers):
+        return
+    Path(LOG_PATH).mkdir(parents=True, exist_ok=True)
+    handler = logging.FileHandler(Path(LOG_PATH) / "slow_queries.log", encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    slow_query_logger.addHandler(handler)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor logging statements slower than SLOW_QUERY_THRESHOLD seconds.
+
+    SQLite steps through rows lazily, so the time spent fetching is added to the
+    time of `execute` before the statement is compared with the threshold.
+    """
+
+    def execute(self, sql, parameters=()):
+        self._sql, self._parameters, self._logged = sql, parameters, False
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            self._elapsed = time.perf_counter() - start
+            self._check()
+
+    def fetchone(self):
+        return self._timed(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._timed(super().fetchmany, *(() if size is None else (size,)))
+
+    def fetchall(self):
+        return self._timed(super().fetchall)
+
+    def _timed(self, fetch, *args):
+        start = time.perf_counter()
+        try:
+            return fetch(*args)
+        finally:
+            if hasattr(self, "_elapsed"):
+                self._elapsed += time.perf_counter() - start
+                self._check()
+
+    def _check(self):
+        if self._logged or self._elapsed < SLOW_QUERY_THRESHOLD:
+            return
+        self._logged = True
+        try:
+            plan = [row[3] for row in self.connection.execute(f"EXPLAIN QUERY PLAN {self._sql}", self._parameters)]
+        except sqlite3.Error as e:
+            plan = [f"unavailable: {e}"]
+        slow_query_logger.warning(json.dumps({
+            "time": datetime.now(timezone.utc).isoformat(),
+            "duration": round(self._elapsed, 6),
+            "sql": " ".join(self._sql.split()),
+            "parameters": self._parameters if isinstance(self._parameters, dict) else list(self._parameters),
+            "query_plan": plan,
+        }, default=str))
+
+
+def start_profiler() -> cProfile.Profile:
+    profiler = cProfile.Profile()
+    profiler.enable()
+    return profiler
+
+
+def dump_profile(profiler: cProfile.Profile, label: str) -> Path:
+    """Stop `profiler` and write its stats to PROFILE_PATH; load them with pstats.Stats(path)."""
+    profiler.disable()
+    Path(PROFILE_PATH).mkdir(parents=True, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%f")
+    path = Path(PROFILE_PATH) / f"{stamp}-{re.sub(r'[^A-Za-z0-9.]+', '_', label).strip('_')}.pstats"
+    profiler.dump_stats(path)
+    logger.info(f"Wrote request profile to {path}")
+    return path